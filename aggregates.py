@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from distinct import count_distinct
+from profiling import timed
+
+ACTIVITY_KEYS = ["Country", "InvoiceYearMonth", "Weekday", "Hour"]
+
+# Label hari (Senin = 0, sama dengan dt.weekday) dan bulan (Januari = 0) per bahasa
+DAY_LABELS = {
+    "id": ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"],
+    "en": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+}
+MONTH_LABELS = {
+    "id": [
+        "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+        "Juli", "Agustus", "September", "Oktober", "November", "Desember",
+    ],
+    "en": [
+        "January", "February", "March", "April", "May", "June",
+        "July", "August", "September", "October", "November", "December",
+    ],
+}
+
+
+def year_month_labels(codes):
+    """Kode yyyymm (int) -> label "2010-12" untuk sumbu chart."""
+    codes = np.asarray(codes, dtype=np.int64)
+    return pd.Index(codes // 100).astype(str) + "-" + pd.Index(codes % 100).astype(str).str.zfill(2)
+
+
+@dataclass
+class AggregateCube:
+    """Agregat ringkas yang dipakai bersama oleh semua expander visualisasi.
+
+    activity  : Country x InvoiceYearMonth (yyyymm) x Weekday x Hour -> Revenue, Quantity, Lines, Invoices
+    products  : per Description -> TotalRevenue, TotalQuantity, Lines, PriceSum, UniqueInvoices
+    customers : InvoiceYearMonth x Country -> jumlah CustomerID unik
+    monthly_customers : InvoiceYearMonth -> jumlah CustomerID unik (semua negara)
+    activity_matrix : jumlah invoice, array int64 (12 bulan x 7 hari x 24 jam);
+        chart hari / jam / bulan cukup menjumlahkan sumbu array kecil ini
+    """
+
+    activity: pd.DataFrame
+    products: pd.DataFrame
+    customers: pd.Series
+    monthly_customers: pd.Series
+    activity_matrix: np.ndarray
+
+
+@timed("build_cube")
+def build_cube(df):
+    """Satu kali scan transaksi -> cube agregat. Semua chart cukup slicing dari sini."""
+    activity = df.groupby(ACTIVITY_KEYS, observed=True).agg(
+        Revenue=("TotalAmount", "sum"),
+        Quantity=("Quantity", "sum"),
+        Lines=("TotalAmount", "size"),
+    )
+
+    # Tiap invoice dihitung sekali di sel baris pertamanya, jadi kolom Invoices
+    # bisa dijumlahkan lintas negara/bulan/hari/jam tanpa double count.
+    first_line = ~df["InvoiceKey"].duplicated()
+    invoices = df.loc[first_line].groupby(ACTIVITY_KEYS, observed=True).size()
+    activity["Invoices"] = invoices.reindex(activity.index, fill_value=0).astype("int64")
+
+    # Matriks bulan x hari x jam dari kode integer dalam satu bincount
+    calendar = df.loc[first_line, ["InvoiceYearMonth", "Weekday", "Hour"]].to_numpy(np.int64)
+    cell = (calendar[:, 0] % 100 - 1) * (7 * 24) + calendar[:, 1] * 24 + calendar[:, 2]
+    activity_matrix = np.bincount(cell, minlength=12 * 7 * 24).reshape(12, 7, 24)
+
+    by_product = df.assign(UnitPrice=df["UnitPrice"].astype("float64")).groupby("Description", observed=True)
+    products = by_product.agg(
+        TotalRevenue=("TotalAmount", "sum"),
+        TotalQuantity=("Quantity", "sum"),
+        Lines=("TotalAmount", "size"),
+        PriceSum=("UnitPrice", "sum"),
+    )
+    # Baris tanpa Description tidak punya grup (ngroup = NaN): dibuang sebelum count_distinct
+    product_codes = by_product.ngroup().to_numpy()
+    has_product = ~np.isnan(product_codes)
+    products["UniqueInvoices"] = count_distinct(
+        product_codes[has_product].astype(np.int64), df["InvoiceKey"].to_numpy()[has_product], by_product.ngroups
+    )
+
+    # Customer unik tidak bisa dijumlahkan antar bulan, jadi disimpan per bulan (exact)
+    tx = df.loc[df["CustomerID"].notna()]
+    keys = tx["CustomerKey"].to_numpy()
+    by_month_country = tx.groupby(["InvoiceYearMonth", "Country"], observed=True)
+    customers = pd.Series(
+        count_distinct(by_month_country.ngroup().to_numpy(), keys, by_month_country.ngroups),
+        index=by_month_country.size().index,
+        name="CustomerID",
+    )
+
+    by_month = tx.groupby("InvoiceYearMonth")
+    monthly_customers = pd.Series(
+        count_distinct(by_month.ngroup().to_numpy(), keys, by_month.ngroups),
+        index=by_month.size().index,
+        name="CustomerID",
+    )
+
+    return AggregateCube(
+        activity=activity,
+        products=products,
+        customers=customers,
+        monthly_customers=monthly_customers,
+        activity_matrix=activity_matrix,
+    )
+
+
+def country_summary(cube, exclude=None):
+    """Revenue, jumlah baris, quantity & invoice unik per negara (urut revenue terbesar)."""
+    activity = cube.activity
+    if exclude is not None:
+        countries = activity.index.get_level_values("Country")
+        activity = activity[~countries.isin(exclude)]
+
+    country = (
+        activity.groupby(level="Country", observed=True)
+        .agg(
+            TotalRevenue=("Revenue", "sum"),
+            TransactionCount=("Lines", "sum"),
+            TotalQuantity=("Quantity", "sum"),
+            UniqueInvoices=("Invoices", "sum"),
+        )
+        .sort_values("TotalRevenue", ascending=False)
+    )
+
+    country["RevenuePercentage"] = (
+        country["TotalRevenue"] / country["TotalRevenue"].sum() * 100
+    ).round(2)
+    return country
+
+
+def monthly_summary(cube, country=None):
+    """TotalAmount, Orders, Active_Customers per bulan (opsional: satu negara saja)."""
+    activity = cube.activity
+    if country is None:
+        customers = cube.monthly_customers
+    else:
+        activity = activity.xs(country, level="Country")
+        in_country = cube.customers.index.get_level_values("Country") == country
+        customers = cube.customers[in_country].droplevel("Country")
+
+    monthly = activity.groupby(level="InvoiceYearMonth").agg(
+        TotalAmount=("Revenue", "sum"),
+        Orders=("Invoices", "sum"),
+    )
+    monthly["Active_Customers"] = customers.reindex(monthly.index, fill_value=0)
+    return monthly.sort_index().reset_index()
+
+
+def country_monthly_index(cube):
+    """Agregat bulanan semua negara dalam satu tabel urut per negara + offset tiap negara.
+
+    Return (table, offsets): table berisi InvoiceYearMonth (label "2010-12"), TotalAmount, Orders,
+    Active_Customers, AOV; offsets = {negara: (start, stop)} baris di table.
+    """
+    monthly = cube.activity.groupby(level=["Country", "InvoiceYearMonth"], observed=True).agg(
+        TotalAmount=("Revenue", "sum"),
+        Orders=("Invoices", "sum"),
+    )
+    customers = cube.customers.swaplevel().reindex(monthly.index, fill_value=0)
+    monthly["Active_Customers"] = customers.to_numpy()
+    monthly["AOV"] = monthly["TotalAmount"] / monthly["Orders"]
+
+    table = monthly.reset_index().sort_values(["Country", "InvoiceYearMonth"], ignore_index=True)
+    table["InvoiceYearMonth"] = year_month_labels(table["InvoiceYearMonth"])
+
+    codes, countries = pd.factorize(table["Country"])
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(table)]
+    offsets = {country: (start, stop) for country, start, stop in zip(countries, starts, stops)}
+
+    return table.drop(columns="Country"), offsets
+
+
+def country_monthly_slice(index, country):
+    """Baris bulanan satu negara: slice O(jumlah bulan) tanpa filter / copy."""
+    table, offsets = index
+    start, stop = offsets.get(country, (0, 0))
+    return table.iloc[start:stop]
+
+
+def product_summary(cube):
+    products = cube.products
+    summary = products[["TotalRevenue", "TotalQuantity", "UniqueInvoices"]].copy()
+    summary["AvgPrice"] = products["PriceSum"] / products["Lines"]
+    summary.index.name = "Description"
+    return summary.reset_index()
+
+
+def day_summary(cube, locale="id"):
+    """Jumlah invoice per hari (Senin..Minggu)."""
+    return pd.DataFrame({
+        "DayName": DAY_LABELS[locale],
+        "TransactionCount": cube.activity_matrix.sum(axis=(0, 2)),
+    })
+
+
+def hourly_summary(cube, day):
+    """Jumlah invoice per jam (0-23) untuk satu hari (kode weekday, Senin = 0)."""
+    return pd.DataFrame({
+        "Hour": np.arange(24),
+        "TransactionCount": cube.activity_matrix[:, day, :].sum(axis=0),
+    })
+
+
+def month_name_summary(cube, locale="id"):
+    """Jumlah invoice per nama bulan (gabungan semua tahun)."""
+    return pd.DataFrame({
+        "InvoiceMonthName": MONTH_LABELS[locale],
+        "TransactionCount": cube.activity_matrix.sum(axis=(1, 2)),
+    })
@@ -0,0 +1,130 @@
+"""Market basket analysis (FP-Growth) di atas matriks sparse invoice x StockCode."""
+import inspect
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from mlxtend.frequent_patterns import association_rules, fpgrowth
+from scipy import sparse
+
+from data_loader import CACHE_DIR
+from profiling import timed
+
+RULES_DIR = os.path.join(CACHE_DIR, "rules")
+MIN_SUPPORT = 0.02
+MIN_INVOICES = 50
+BASKET_COLUMNS = ["InvoiceNo", "InvoiceKey", "StockCode", "Description", "Quantity"]
+RULE_COLUMNS = ["antecedents", "consequents", "support", "confidence", "lift"]
+
+
+def basket_matrix(df):
+    """Matriks boolean CSR invoice x StockCode (hanya pembelian, tanpa cancel / retur).
+
+    Return (matrix, items) dengan items = StockCode untuk tiap kolom.
+    """
+    purchases = (df["Quantity"] > 0) & ~df["InvoiceNo"].str.startswith("C", na=False)
+    tx = df.loc[purchases, ["InvoiceKey", "StockCode"]]
+
+    inv_codes, invoices = pd.factorize(tx["InvoiceKey"])
+    item_codes, items = pd.factorize(tx["StockCode"])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(tx), dtype=bool), (inv_codes, item_codes)),
+        shape=(len(invoices), len(items)),
+    )
+    return matrix, np.asarray(items, dtype=str)
+
+
+def mine_rules(matrix, items, min_support=MIN_SUPPORT, min_lift=1.0, max_len=3):
+    """FP-Growth + association rules, diurutkan berdasarkan lift."""
+    if matrix.shape[0] == 0:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    # Item yang support-nya di bawah threshold tidak mungkin masuk itemset mana pun
+    support = np.asarray(matrix.sum(axis=0)).ravel() / matrix.shape[0]
+    keep = np.flatnonzero(support >= min_support)
+    if len(keep) == 0:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    basket = pd.DataFrame.sparse.from_spmatrix(matrix[:, keep], columns=items[keep])
+    frequent = fpgrowth(basket, min_support=min_support, use_colnames=True, max_len=max_len)
+    if frequent.empty:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    # mlxtend >= 0.23.2 meminta jumlah transaksi (num_itemsets)
+    kwargs = {}
+    if "num_itemsets" in inspect.signature(association_rules).parameters:
+        kwargs["num_itemsets"] = matrix.shape[0]
+    rules = association_rules(frequent, metric="lift", min_threshold=min_lift, **kwargs)
+    return rules[RULE_COLUMNS].sort_values("lift", ascending=False, ignore_index=True)
+
+
+def describe_rules(rules, descriptions):
+    """Ganti frozenset StockCode di antecedents / consequents dengan teks Description."""
+    def label(itemset):
+        return ", ".join(sorted(str(descriptions.get(code, code)) for code in itemset))
+
+    return rules.assign(
+        antecedents=rules["antecedents"].map(label),
+        consequents=rules["consequents"].map(label),
+    )
+
+
+def _mine_group(group, df, min_support, max_len):
+    matrix, items = basket_matrix(df)
+    rules = mine_rules(matrix, items, min_support=min_support, max_len=max_len)
+    rules.insert(0, "Group", group)
+    rules.insert(1, "Invoices", matrix.shape[0])
+    return rules
+
+
+@timed("mine_rules")
+def mine_rules_by_group(df, group_col, min_support=MIN_SUPPORT, max_len=3, n_jobs=-1, min_invoices=MIN_INVOICES):
+    """Mining rules per negara / segmen, tiap grup di proses terpisah (joblib)."""
+    groups = [
+        (group, part[BASKET_COLUMNS])
+        for group, part in df.groupby(group_col, observed=True)
+        if part["InvoiceKey"].nunique() >= min_invoices
+    ]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_mine_group)(group, part, min_support, max_len) for group, part in groups
+    )
+
+    descriptions = (
+        df.drop_duplicates("StockCode").set_index("StockCode")["Description"].astype(str).to_dict()
+    )
+    rules = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=["Group", "Invoices"] + RULE_COLUMNS)
+    return describe_rules(rules, descriptions)
+
+
+def load_or_mine_rules(load_df, version, group_col, min_support=MIN_SUPPORT, rules_dir=RULES_DIR,
+                       data_version=None):
+    """Rules tersimpan di disk per (versi dataset, grup, min_support); load_df() hanya dipanggil kalau belum ada.
+
+    version boleh versi tampilan (versi dataset + hash filter); data_version = versi dataset
+    di dalamnya (default: version). Rules milik versi dataset lain dihapus saat menulis.
+    """
+    path = os.path.join(rules_dir, f"{group_col}-{min_support:g}-{version}.pkl")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    rules = mine_rules_by_group(load_df(), group_col, min_support=min_support)
+
+    os.makedirs(rules_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(rules, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    # Rules dari versi dataset lama tidak akan dibaca lagi; filter lain di versi yang sama tetap
+    current = f"-{data_version or version}"
+    for name in os.listdir(rules_dir):
+        if name.endswith(".pkl") and not (name.endswith(current + ".pkl") or current + "-" in name):
+            try:
+                os.remove(os.path.join(rules_dir, name))
+            except FileNotFoundError:
+                # Sudah dihapus sesi / proses lain
+                pass
+    return rules
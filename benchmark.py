@@ -0,0 +1,211 @@
+"""Benchmark pipeline data dashboard dengan data sintetis berbentuk OnlineRetail.csv.
+
+Pemakaian:
+    python benchmark.py                          # 0.5M, 5M, 50M baris
+    python benchmark.py --rows 500000 --json hasil.json
+    python benchmark.py --rows 50000000 --max-in-memory 0   # hanya jalur streaming
+
+Tiap stage dilaporkan: waktu, throughput (baris/detik) dan peak memori (tracemalloc).
+"""
+import argparse
+import json
+import os
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from aggregates import (
+    build_cube,
+    country_monthly_index,
+    country_summary,
+    day_summary,
+    hourly_summary,
+    month_name_summary,
+    monthly_summary,
+    product_summary,
+)
+from clustering import fit_kmeans, k_sweep, rfm_features
+from data_loader import CACHE_DIR, add_calendar_columns, clean_transactions, read_raw
+from incremental import stream_state
+from profiling import column_footprint
+from rfm import rfm_from_state, rfm_state, score_rfm
+
+BENCH_DIR = os.path.join(CACHE_DIR, "bench")
+DEFAULT_ROWS = [500_000, 5_000_000, 50_000_000]
+GENERATE_CHUNK = 1_000_000
+
+COUNTRIES = [
+    "United Kingdom", "Germany", "France", "EIRE", "Spain", "Netherlands", "Belgium",
+    "Switzerland", "Portugal", "Australia", "Norway", "Italy", "Channel Islands", "Finland",
+    "Cyprus", "Sweden", "Austria", "Denmark", "Japan", "Poland", "USA", "Israel",
+    "Unspecified", "Singapore", "Iceland", "Canada", "Greece", "Malta",
+    "United Arab Emirates", "European Community", "RSA", "Lebanon", "Lithuania",
+    "Brazil", "Czech Republic", "Bahrain", "Saudi Arabia",
+]
+
+
+def generate_csv(path, rows, seed=42, lines_per_invoice=20, n_products=4_000):
+    """Tulis CSV sintetis dengan kolom, format dan distribusi kasar mirip OnlineRetail.csv."""
+    rng = np.random.default_rng(seed)
+    n_customers = max(rows // 130, 10)
+    start = np.datetime64("2010-12-01T08:00")
+    minutes = int((np.datetime64("2011-12-09T20:00") - start) / np.timedelta64(1, "m"))
+
+    # UK ~90% transaksi, sisanya tersebar ke negara lain
+    country_p = np.r_[0.9, np.full(len(COUNTRIES) - 1, 0.1 / (len(COUNTRIES) - 1))]
+    customer_country = rng.choice(len(COUNTRIES), size=n_customers, p=country_p)
+    prices = np.round(rng.lognormal(1.0, 0.9, n_products), 2)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    invoice_offset = 0
+    with open(path, "w", encoding="latin1", newline="") as f:
+        for chunk_start in range(0, rows, GENERATE_CHUNK):
+            n = min(GENERATE_CHUNK, rows - chunk_start)
+            n_invoices = max(n // lines_per_invoice, 1)
+
+            # Baris satu invoice selalu berurutan, seperti file aslinya
+            inv_local = np.sort(rng.integers(0, n_invoices, n))
+            invoice = inv_local + invoice_offset
+            invoice_offset += n_invoices
+
+            # Atribut per invoice: customer, waktu, cancel
+            inv_customer = rng.integers(0, n_customers, n_invoices)
+            inv_minute = np.sort(rng.integers(0, minutes, n_invoices))
+            inv_cancel = rng.random(n_invoices) < 0.02
+            inv_missing = rng.random(n_invoices) < 0.25
+
+            product = rng.zipf(1.3, n) % n_products
+            quantity = rng.geometric(0.15, n)
+            quantity = np.where(inv_cancel[inv_local], -quantity, quantity)
+            customer = inv_customer[inv_local]
+
+            chunk = pd.DataFrame({
+                "InvoiceNo": np.char.add(np.where(inv_cancel[inv_local], "C", ""), (536365 + invoice).astype(str)),
+                "StockCode": (10_000 + product).astype(str),
+                "Description": np.char.add("PRODUCT ", product.astype(str)),
+                "Quantity": quantity,
+                "InvoiceDate": pd.to_datetime(start + inv_minute[inv_local].astype("timedelta64[m]"))
+                .strftime("%m/%d/%Y %H:%M"),
+                "UnitPrice": prices[product],
+                "CustomerID": np.where(inv_missing[inv_local], "", (12_346 + customer).astype(str)),
+                "Country": np.asarray(COUNTRIES)[customer_country[customer]],
+            })
+            chunk.to_csv(f, index=False, header=chunk_start == 0)
+
+
+class Recorder:
+    """Catat waktu, throughput dan peak memori tiap stage."""
+
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.results = []
+
+    @contextmanager
+    def stage(self, name, rows):
+        if self.track_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if self.track_memory else 0
+            if self.track_memory:
+                tracemalloc.stop()
+            self.results.append({
+                "stage": name,
+                "rows": rows,
+                "seconds": round(seconds, 4),
+                "rows_per_sec": round(rows / seconds) if seconds > 0 else None,
+                "peak_mb": round(peak / 2**20, 1) if self.track_memory else None,
+            })
+            print(f"  {name:<28} {seconds:9.3f}s  {rows / max(seconds, 1e-9):>14,.0f} baris/s"
+                  + (f"  peak {peak / 2**20:8.1f} MB" if self.track_memory else ""))
+
+
+def run_in_memory(path, rows, rec):
+    with rec.stage("read_csv", rows):
+        raw = read_raw(path)
+    with rec.stage("clean", rows):
+        df = clean_transactions(raw)
+    del raw
+    with rec.stage("calendar_columns", rows):
+        df = add_calendar_columns(df)
+
+    table_mb = float(column_footprint(df)["MB"].sum())
+    print(f"  tabel transaksi: {table_mb:,.1f} MB ({table_mb * 2**20 / max(len(df), 1):.0f} byte/baris)")
+
+    with rec.stage("build_cube", rows):
+        cube = build_cube(df)
+    with rec.stage("country_summary", rows):
+        country_summary(cube)
+        country_summary(cube, exclude=["United Kingdom"])
+    with rec.stage("monthly_summary", rows):
+        monthly_summary(cube)
+    with rec.stage("country_monthly_index", rows):
+        country_monthly_index(cube)
+    with rec.stage("product_summary", rows):
+        product_summary(cube)
+    with rec.stage("day_hour_month", rows):
+        day_summary(cube)
+        hourly_summary(cube, 0)
+        month_name_summary(cube)
+
+    with rec.stage("rfm", rows):
+        rfm = score_rfm(rfm_from_state(rfm_state(df)))
+    del df
+
+    customers = len(rfm)
+    with rec.stage("rfm_features", customers):
+        X, _ = rfm_features(rfm)
+    with rec.stage("kmeans_fit_k4", customers):
+        fit_kmeans(X, 4)
+    with rec.stage("k_sweep", customers):
+        k_sweep(X, range(2, 7), sample_size=5_000)
+
+    return {"table_mb": round(table_mb, 1)}
+
+
+def run_streaming(path, rows, rec):
+    with rec.stage("stream_state", rows):
+        stream_state(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline data dashboard.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--max-in-memory", type=int, default=10_000_000,
+                        help="di atas jumlah baris ini hanya jalur streaming yang dijalankan")
+    parser.add_argument("--no-memory", action="store_true", help="matikan tracemalloc (overhead lebih kecil)")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    report = []
+    for rows in args.rows:
+        path = os.path.join(BENCH_DIR, f"synthetic-{rows}.csv")
+        if not os.path.exists(path):
+            print(f"Generate {rows:,} baris -> {path}")
+            generate_csv(path, rows)
+
+        print(f"\n=== {rows:,} baris ===")
+        rec = Recorder(track_memory=not args.no_memory)
+        run = {"rows": rows}
+        if rows <= args.max_in_memory:
+            run.update(run_in_memory(path, rows, rec))
+        run_streaming(path, rows, rec)
+        report.append({**run, "stages": rec.results})
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nPeak RSS proses: {max_rss:,.0f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"runs": report, "max_rss_mb": round(max_rss, 1)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Helper Plotly: scatter untuk data besar dan cache figure."""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.express as px
+
+from profiling import stage
+
+# Di atas jumlah titik ini scatter dirender WebGL dan (opsional) di-decimate
+LARGE_SCATTER_POINTS = 2_000
+
+
+def _symlog(values):
+    # log10 simetris: tetap terdefinisi untuk nol / negatif (mis. quantity retur)
+    values = np.asarray(values, dtype=np.float64)
+    return np.sign(values) * np.log10(1 + np.abs(values))
+
+
+def decimate_scatter(df, x, y, bins=80, keep_extremes=200):
+    """Kurangi titik scatter di server: satu titik per sel grid log-space.
+
+    Tiap sel diwakili titik dengan y terbesar, jumlah titik asli di sel disimpan di
+    kolom BinCount. keep_extremes titik dengan x / y terbesar selalu dipertahankan
+    supaya outlier tidak hilang.
+    """
+    gx, gy = _symlog(df[x]), _symlog(df[y])
+
+    def to_bin(values):
+        span = values.max() - values.min()
+        scaled = (values - values.min()) / (span if span > 0 else 1)
+        return np.minimum((scaled * bins).astype(np.int64), bins - 1)
+
+    cell = to_bin(gx) * bins + to_bin(gy)
+    counts = np.bincount(cell, minlength=bins * bins)
+
+    # Urutkan per sel lalu y menurun: baris pertama tiap sel = perwakilan sel
+    order = np.lexsort((-df[y].to_numpy(), cell))
+    first = order[np.r_[True, cell[order][1:] != cell[order][:-1]]]
+
+    extremes = np.union1d(
+        np.argsort(-df[x].to_numpy())[:keep_extremes],
+        np.argsort(-df[y].to_numpy())[:keep_extremes],
+    )
+    keep = np.union1d(first, extremes)
+
+    # Outlier tambahan (bukan perwakilan sel) hanya mewakili dirinya sendiri
+    bin_count = counts[cell[keep]]
+    bin_count[~np.isin(keep, first)] = 1
+
+    reduced = df.iloc[keep].copy()
+    reduced["BinCount"] = bin_count
+    return reduced
+
+
+def large_scatter(df, x, y, decimate=True, max_points=LARGE_SCATTER_POINTS, **kwargs):
+    """px.scatter yang otomatis pindah ke WebGL (scattergl) untuk data besar.
+
+    Kalau decimate=True dan titik > max_points, data di-decimate dulu dengan
+    decimate_scatter(); hover menampilkan BinCount (jumlah titik yang diwakili).
+    """
+    if len(df) <= max_points:
+        return px.scatter(df, x=x, y=y, **kwargs)
+
+    if decimate:
+        df = decimate_scatter(df, x, y)
+        hover_data = dict(kwargs.pop("hover_data", {}) or {})
+        hover_data["BinCount"] = True
+        kwargs["hover_data"] = hover_data
+
+    return px.scatter(df, x=x, y=y, render_mode="webgl", **kwargs)
+
+
+def payload_bytes(obj):
+    """Perkiraan ukuran payload figure (dict dari fig.to_dict()) tanpa serialisasi JSON.
+
+    Array numerik dihitung dari nbytes (Plotly mengirimnya sebagai typed array), string
+    dari panjangnya; cukup akurat untuk batas ukuran cache.
+    """
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "OUS":
+            return sum(len(str(value)) for value in obj.ravel())
+        return obj.nbytes
+    if isinstance(obj, str):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(len(str(key)) + payload_bytes(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(payload_bytes(value) for value in obj)
+    return 8
+
+
+class FigureCache:
+    """LRU cache figure Plotly, dibatasi jumlah entry dan perkiraan total ukuran payload.
+
+    Key bebas (tuple versi dataset + nilai widget); aman dipakai dari banyak sesi / thread.
+    Yang disimpan objek figure: st.plotly_chart tetap men-serialisasi sendiri saat render
+    (dict / JSON tidak bisa dirender tanpa validasi ulang), jadi cache tidak ikut
+    men-serialisasi ke JSON; ukuran entry hanya diperkirakan (payload_bytes).
+    """
+
+    def __init__(self, max_entries=64, max_bytes=64 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key -> (figure, perkiraan ukuran payload dalam byte)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Figure untuk key; build() hanya dipanggil kalau belum ada di cache."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Nama stage = elemen pertama key (mis. "atlas")
+        label = key[0] if isinstance(key, tuple) and key else key
+        with stage(f"figure:{label}"):
+            fig = build()
+            size = payload_bytes(fig.to_dict())
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (fig, size)
+            self._bytes += size
+
+            # Buang entry paling lama dipakai sampai kembali di bawah batas
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
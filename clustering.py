@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+from profiling import timed
+from rfm import RFM_COLUMNS
+
+K_RANGE = range(2, 11)
+
+
+@timed("rfm_features")
+def rfm_features(rfm, scaler=None):
+    """Matriks fitur float32: log1p(Recency, Frequency, Monetary) lalu standardisasi.
+
+    Monetary negatif (customer yang lebih banyak retur) di-clip ke 0 sebelum log.
+    Return (X, scaler); scaler yang sudah di-fit bisa dipakai ulang untuk data baru.
+    """
+    X = np.log1p(rfm[RFM_COLUMNS].clip(lower=0).to_numpy(np.float32))
+    if scaler is None:
+        scaler = StandardScaler().fit(X)
+    return scaler.transform(X).astype(np.float32), scaler
+
+
+@timed("fit_kmeans")
+def fit_kmeans(X, k, random_state=42, batch_size=4096):
+    """MiniBatchKMeans: fit per batch, jadi tetap cepat untuk jutaan customer."""
+    return MiniBatchKMeans(
+        n_clusters=k,
+        batch_size=batch_size,
+        n_init=3,
+        random_state=random_state,
+    ).fit(X)
+
+
+def _evaluate_k(X, k, random_state):
+    model = fit_kmeans(X, k, random_state)
+    return {
+        "k": k,
+        "Inertia": model.inertia_,
+        "Silhouette": silhouette_score(X, model.labels_),
+    }
+
+
+@timed("k_sweep")
+def k_sweep(X, k_values=K_RANGE, sample_size=10_000, n_jobs=-1, random_state=42):
+    """Elbow (inertia) + silhouette untuk beberapa k, dihitung paralel di semua core.
+
+    Dievaluasi pada subset acak (sample_size baris) karena silhouette O(n^2).
+    k >= jumlah baris dilewati (silhouette butuh k <= n - 1).
+    """
+    k_values = [k for k in k_values if k < len(X)]
+    rng = np.random.default_rng(random_state)
+    if len(X) > sample_size:
+        X = X[rng.choice(len(X), size=sample_size, replace=False)]
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_k)(X, k, random_state) for k in k_values
+    )
+    return pd.DataFrame(results)
+
+
+def cluster_profile(rfm, labels):
+    """Jumlah customer dan rata-rata R/F/M per cluster."""
+    profile = rfm.assign(Cluster=labels).groupby("Cluster").agg(
+        Customers=("Recency", "size"),
+        AvgRecency=("Recency", "mean"),
+        AvgFrequency=("Frequency", "mean"),
+        AvgMonetary=("Monetary", "mean"),
+        TotalMonetary=("Monetary", "sum"),
+    )
+    profile["CustomerPercentage"] = (profile["Customers"] / profile["Customers"].sum() * 100).round(2)
+    return profile.reset_index()
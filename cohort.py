@@ -0,0 +1,69 @@
+"""Analisis cohort: pelanggan dikelompokkan per bulan pembelian pertama.
+
+Dihitung dari CustomerTimeline (kode bulan integer), jadi satu bincount per matriks;
+tidak ada groupby bertingkat di atas Period.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from aggregates import year_month_labels
+from profiling import timed
+
+
+@dataclass
+class Cohorts:
+    """Matriks cohort (baris = bulan pembelian pertama, kolom = bulan ke-n sejak itu).
+
+    sizes     : jumlah customer baru per cohort
+    active    : jumlah customer cohort yang aktif di bulan ke-n
+    retention : active / sizes (0..1)
+    revenue   : total Revenue cohort di bulan ke-n
+    Sel setelah bulan terakhir dataset berisi NaN.
+    """
+
+    sizes: pd.Series
+    active: pd.DataFrame
+    retention: pd.DataFrame
+    revenue: pd.DataFrame
+
+
+@timed("cohorts", rows=None)
+def cohort_matrices(timeline):
+    """Cohort retention & revenue dari CustomerTimeline."""
+    cells = timeline.invoices.tocoo()
+    rows, cols = cells.row, cells.col
+    n_customers, n_months = timeline.invoices.shape
+
+    # Bulan pertama tiap customer = kolom aktif terkecil di barisnya
+    first = np.full(n_customers, n_months, dtype=np.int64)
+    np.minimum.at(first, rows, cols)
+
+    cohort = first[rows]
+    flat = cohort * n_months + (cols - cohort)
+    revenue_cells = np.asarray(timeline.revenue[rows, cols]).ravel()
+
+    active = np.bincount(flat, minlength=n_months * n_months).reshape(n_months, n_months).astype(np.float64)
+    revenue = np.bincount(flat, weights=revenue_cells, minlength=n_months * n_months).reshape(n_months, n_months)
+    sizes = np.bincount(first[first < n_months], minlength=n_months)
+
+    # Cohort bulan c hanya punya data sampai bulan ke-(n_months - 1 - c)
+    age = np.arange(n_months)
+    beyond = age[None, :] > (n_months - 1 - age)[:, None]
+    active[beyond] = np.nan
+    revenue[beyond] = np.nan
+
+    index = pd.Index(year_month_labels(timeline.months), name="Cohort")
+    columns = pd.Index(age, name="MonthsSinceFirst")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        retention = active / sizes[:, None]
+
+    # Bulan tanpa customer baru tidak punya cohort
+    has_customers = sizes > 0
+    return Cohorts(
+        sizes=pd.Series(sizes, index=index, name="Customers")[has_customers],
+        active=pd.DataFrame(active, index=index, columns=columns)[has_customers],
+        retention=pd.DataFrame(retention, index=index, columns=columns)[has_customers],
+        revenue=pd.DataFrame(revenue, index=index, columns=columns)[has_customers],
+    )
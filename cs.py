@@ -1,30 +1,272 @@
+import os
+import time
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
-# === Import Data ===
-df = pd.read_csv("OnlineRetail.csv", encoding="latin1", dtype=str, low_memory=False)
-df.drop_duplicates(inplace=True)
-# Konversi ke numerik
-df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce')
-df['UnitPrice'] = pd.to_numeric(df['UnitPrice'], errors='coerce')
+from aggregates import (
+    DAY_LABELS,
+    country_monthly_index,
+    country_monthly_slice,
+    country_summary,
+    day_summary,
+    hourly_summary,
+    month_name_summary,
+    monthly_summary,
+    product_summary,
+    year_month_labels,
+)
+from basket import MIN_SUPPORT, load_or_mine_rules
+from charts import FigureCache, large_scatter
+from cohort import cohort_matrices
+from clustering import K_RANGE, cluster_profile, fit_kmeans, k_sweep, rfm_features
+from data_loader import DATA_PATH
+from filters import (
+    build_date_store,
+    filter_lines,
+    filter_transactions,
+    filtered_state,
+    month_bounds,
+    view_version,
+)
+from incremental import load_manifest, load_store, partition_stamp, store_version
+from precompute import artifact_path, load_artifacts, load_state, start_warmup, wait_for_precompute
+from profiling import Profiler, activate, memory_footprint
+from rfm import SEGMENT_ORDER, rfm_from_state, score_rfm, segment_summary
+from search import build_search_index, customer_lines, invoice_history, match_customers, match_descriptions
+from sections import fragment, lazy_section
+from timeline import INACTIVE, build_timeline, segment_drift
+
+# PAGE CONFIG
+st.set_page_config(page_title="A25-CS313", layout="wide")
+
+# Bahasa label hari / bulan di chart ("id" atau "en")
+LABEL_LOCALE = "id"
+
+# === Debug: Instrumentasi ===
+# Opsional per sesi: catat waktu, baris & delta memori tiap stage pipeline / section / figure.
+# Mati = tidak ada yang dicatat (overhead praktis nol). Stage di dalam fungsi cache hanya
+# tercatat saat cache miss.
+RUN_STARTED = time.perf_counter()
+DEBUG_TIMING = st.sidebar.checkbox("Debug: timing", value=False, key="debug_timing")
+if DEBUG_TIMING:
+    PROFILER = st.session_state.setdefault("profiler", Profiler())
+    activate(PROFILER)
+else:
+    activate(None)
+
+# === Aggregate Cube + State RFM ===
+# Dibangun streaming per chunk dari CSV (memori terbatas walau file lebih besar dari RAM),
+# disimpan di disk dan di-update inkremental oleh `python incremental.py append <delta.csv>`;
+# semua expander cukup slicing dari cube ini.
+#
+# Semua data turunan memakai cache_resource: satu objek read-only per proses yang dibaca
+# semua sesi tanpa copy (cache_data memberi salinan hasil unpickle ke tiap sesi, jadi
+# memori naik seiring jumlah pengguna). Jangan memodifikasi hasilnya in-place.
+# DATA_VERSION dicek tiap rerun (stat file + manifest): kalau file sumber berubah atau
+# ada delta baru, versi berganti dan max_entries membuang data versi lama.
+# MANIFEST mencatat delta terakhir per (bulan, negara): figure per negara di-key dengan
+# partition_stamp, jadi delta yang tidak menyentuh negara itu tidak membuatnya dibangun ulang.
+DATA_VERSION = store_version(DATA_PATH)
+MANIFEST = load_manifest(DATA_PATH)
+
+# === Warm Start ===
+# `python precompute.py` menyiapkan state, store bertipe, RFM & clustering default di disk
+# sebelum server melayani pengguna. DASHBOARD_WARMUP=1: thread latar (satu per proses)
+# mem-precompute otomatis tiap versi data baru; get_state / get_artifacts menunggu build
+# yang sedang jalan lalu membaca hasilnya dari disk, bukan membangun ulang.
+@st.cache_resource
+def get_warmup():
+    return start_warmup(DATA_PATH) if os.environ.get("DASHBOARD_WARMUP") else None
+
+get_warmup()
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_artifact_file(version, mtime):
+    return load_artifacts(version)
+
+def get_artifacts(version):
+    # Artefak yang belum ada tidak di-cache: begitu warm-up / CLI selesai menulis,
+    # getter berikutnya langsung memakainya (mtime ikut jadi key)
+    wait_for_precompute(version)
+    path = artifact_path(version)
+    if not os.path.exists(path):
+        return {}
+    return get_artifact_file(version, os.path.getmtime(path))
+
+@st.cache_resource(show_spinner="Menyiapkan agregasi...", max_entries=1)
+def get_state(version):
+    return load_state(DATA_PATH)
+
+state = get_state(DATA_VERSION)
+cube = state["cube"]
+
+# === Filter Global (Sidebar) ===
+# Rentang tanggal + negara berlaku untuk semua tab. Saat filter aktif, state (cube, RFM,
+# timeline) dibangun dari potongan store yang urut per tanggal (binary search, bukan scan)
+# dan di-cache per kombinasi filter. VIEW_VERSION = kunci cache untuk data yang tampil.
+@st.cache_resource(show_spinner="Menyiapkan store transaksi...", max_entries=1)
+def get_date_store(version):
+    return build_date_store(load_store(DATA_PATH))
+
+@st.cache_resource(show_spinner="Menerapkan filter...", max_entries=8)
+def get_filtered_state(version, base_version, start, end, countries):
+    return filtered_state(get_date_store(version), base_version, start, end, countries)
+
+MIN_DATE, MAX_DATE = month_bounds(cube)
+ALL_COUNTRIES = sorted(cube.activity.index.get_level_values("Country").unique().astype(str))
+
+with st.sidebar:
+    st.header("Filter")
+    picked_dates = st.date_input(
+        "Rentang Tanggal:",
+        value=(MIN_DATE, MAX_DATE),
+        min_value=MIN_DATE,
+        max_value=MAX_DATE,
+        key="filter_dates"
+    )
+    FILTER_COUNTRIES = tuple(st.multiselect("Negara:", ALL_COUNTRIES, key="filter_countries"))
+
+# Selama tanggal akhir belum dipilih, date_input hanya mengembalikan satu tanggal
+FILTER_START, FILTER_END = picked_dates if len(picked_dates) == 2 else (MIN_DATE, MAX_DATE)
+FILTER_ACTIVE = FILTER_START > MIN_DATE or FILTER_END < MAX_DATE or bool(FILTER_COUNTRIES)
+
+if FILTER_ACTIVE:
+    VIEW_VERSION = view_version(DATA_VERSION, FILTER_START, FILTER_END, FILTER_COUNTRIES)
+    state = get_filtered_state(DATA_VERSION, state["base_version"], FILTER_START, FILTER_END, FILTER_COUNTRIES)
+    if state is None:
+        st.warning("Tidak ada transaksi untuk kombinasi filter ini.")
+        st.stop()
+    cube = state["cube"]
+else:
+    VIEW_VERSION = DATA_VERSION
+
+# Filter bisa menyisakan transaksi tanpa satu pun pembelian ber-CustomerID (mis. negara yang
+# semua barisnya anonim / retur): RFM, segmen, cohort, clustering dan basket tidak bisa dihitung
+N_CUSTOMERS = int((state["rfm_state"]["Frequency"] > 0).sum())
+HAS_CUSTOMERS = N_CUSTOMERS > 0
+NO_CUSTOMERS_WARNING = "Tidak ada transaksi ber-CustomerID untuk filter ini, analisis pelanggan tidak ditampilkan."
+
+# Agregat bulanan per negara, urut per negara + offset: ganti negara = slice, bukan scan.
+# cache_resource supaya tabel dipakai bersama tanpa di-copy tiap rerun (read-only).
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_country_monthly(_cube, version):
+    return country_monthly_index(_cube)
+
+# === Figure Cache ===
+# Figure Plotly dipakai bersama semua sesi (LRU, dibatasi jumlah & ukuran), dengan key
+# versi dataset + nilai widget: hanya figure yang input-nya berubah yang dibangun ulang
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+
+FIGURES = get_figure_cache()
+
+# --- ALL COUNTRY LIST dari Plotly (gapminder), cukup sekali per proses ---
+@st.cache_resource
+def get_world_countries():
+    world = px.data.gapminder()[["country"]].drop_duplicates()
+    world.columns = ["Country"]
+    return world
+
+def build_product_scatter_figure(cube, decimate):
+    # --- Buat agregasi revenue & quantity per produk ---
+    product_scatter = product_summary(cube)
+    product_scatter = product_scatter[product_scatter["TotalRevenue"] > 0]
+
+    # --- Scatter Plot ---
+    fig_scatter = large_scatter(
+        product_scatter,
+        x="TotalQuantity",
+        y="TotalRevenue",
+        decimate=decimate,
+        hover_name="Description",
+        hover_data={
+            "TotalQuantity": True,
+            "TotalRevenue": ":,.0f",
+            "AvgPrice": ":,.2f"
+        },
+        title="Scatter Plot: Total Revenue vs Quantity per Product",
+    )
 
-# Drop baris rusak
-df = df.dropna(subset=['Quantity', 'UnitPrice'])
+    fig_scatter.update_layout(
+        xaxis_title="Total Quantity Sold",
+        yaxis_title="Total Revenue (£)",
+        height=600,
+        plot_bgcolor="white"
+    )
 
-# Hitung total amount
-df['TotalAmount'] = df['Quantity'] * df['UnitPrice']
+    fig_scatter.update_traces(
+        marker=dict(opacity=0.7, line=dict(width=1, color="black"))
+    )
+    return fig_scatter
+
+# === RFM ===
+@st.cache_resource(show_spinner="Menghitung RFM...", max_entries=8)
+def get_rfm(_state, version):
+    artifacts = get_artifacts(version)
+    if "rfm" in artifacts:
+        return artifacts["rfm"]
+    return score_rfm(rfm_from_state(_state["rfm_state"]))
+
+# === Timeline Customer x Bulan ===
+# Matriks sparse aktivitas per customer per bulan; RFM rolling & migrasi segmen dihitung dari sini
+@st.cache_resource(show_spinner="Menyusun timeline pelanggan...", max_entries=8)
+def get_timeline(_state, version):
+    return build_timeline(_state["customer_activity"])
+
+@st.cache_resource(show_spinner="Menghitung segmen rolling...", max_entries=16)
+def get_segment_drift(_timeline, version, window):
+    return segment_drift(_timeline, window)
+
+@st.cache_resource(show_spinner="Menghitung cohort...", max_entries=8)
+def get_cohorts(_timeline, version):
+    return cohort_matrices(_timeline)
+
+# === Indeks Pencarian ===
+# Permutasi integer per customer di atas store urut tanggal yang sama (tanpa salinan
+# tabel kedua) + daftar Description urut: lookup pakai binary search
+@st.cache_resource(show_spinner="Menyiapkan indeks pencarian...", max_entries=1)
+def get_search_index(version):
+    return build_search_index(get_date_store(version).lines)
+
+# === Clustering ===
+@st.cache_resource(show_spinner="Menyiapkan fitur clustering...", max_entries=8)
+def get_features(_rfm, version):
+    artifacts = get_artifacts(version)
+    if "features" in artifacts:
+        return artifacts["features"]
+    X, _ = rfm_features(_rfm)
+    return X
+
+@st.cache_resource(show_spinner="Menghitung elbow & silhouette...", max_entries=8)
+def get_k_sweep(_X, version):
+    artifacts = get_artifacts(version)
+    if "k_sweep" in artifacts:
+        return artifacts["k_sweep"]
+    return k_sweep(_X)
+
+# === Market Basket ===
+# Rules di-mining per negara / segmen secara paralel lalu disimpan di disk per versi dataset
+@st.cache_resource(show_spinner="Mining association rules...", max_entries=16)
+def get_rules(_rfm, version, group_col, min_support):
+    def load():
+        # Ikut filter global: version = VIEW_VERSION, jadi rules per kombinasi filter
+        if FILTER_ACTIVE:
+            df = filter_transactions(get_date_store(DATA_VERSION), FILTER_START, FILTER_END, FILTER_COUNTRIES)
+        else:
+            df = load_store(DATA_PATH)
+        if group_col == "Segment":
+            df = df.assign(Segment=df["CustomerID"].map(_rfm["Segment"]))
+        return df
 
-# Convert InvoiceDate
-df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-df['InvoiceYearMonth'] = df['InvoiceDate'].dt.to_period('M')
-df['InvoiceDate_only'] = df['InvoiceDate'].dt.date
-df['DayName'] = df['InvoiceDate'].dt.day_name()
-df["Hour"] = df["InvoiceDate"].dt.hour
-df['InvoiceMonthName'] = df['InvoiceDate'].dt.strftime("%B")
+    return load_or_mine_rules(load, version, group_col, min_support, data_version=DATA_VERSION)
 
-# PAGE CONFIG
-st.set_page_config(page_title="A25-CS313", layout="wide")
+# Model di-cache per (versi fitur, k): kembali ke k yang pernah dipilih tidak perlu fit ulang
+@st.cache_resource(show_spinner="Melatih model clustering...", max_entries=32)
+def get_kmeans(_X, version, k):
+    model = get_artifacts(version).get("kmeans", {}).get(k)
+    return model if model is not None else fit_kmeans(_X, k)
 
 st.title("Customer Insight Mining: Pendekatan RFM dan Machine Learning untuk Meningkatkan Loyalitas Pelanggan")
 
@@ -38,84 +280,70 @@ with tab_visualization:
 #============ VISUALISASI PEMBELI BERDASARKAN NEGARA (ATLAS WORLD MAP) =============
     st.subheader("ANALISIS PENJUALAN DAN PENDAPATAN BERDASARKAN NEGARA")
 
-    # --- Hitung revenue, transaksi, dll ---
-    country_info = (
-        df.groupby("Country")
-        .agg(
-            TotalRevenue=("TotalAmount", "sum"),
-            TransactionCount=("InvoiceNo", "nunique")
+    # --- CHOROPLETH ATLAS MAP ---
+    def build_fig_atlas():
+        # --- Hitung revenue, transaksi, dll ---
+        country_info = (
+            country_summary(cube)[["TotalRevenue", "UniqueInvoices"]]
+            .rename(columns={"UniqueInvoices": "TransactionCount"})
+            .reset_index()
         )
-        .reset_index()
-    )
 
-    country_info["Purchased"] = 1  # indikator negara pembeli
+        country_info["Purchased"] = 1  # indikator negara pembeli
 
-    # --- ALL COUNTRY LIST dari Plotly (gapminder) ---
-    world = px.data.gapminder()[["country"]].drop_duplicates()
-    world.columns = ["Country"]
+        # --- Merge: negara pembeli + negara yang tidak beli ---
+        world_map = get_world_countries().merge(country_info, on="Country", how="left")
+        world_map["Purchased"] = world_map["Purchased"].fillna(0)
 
-    # --- Merge: negara pembeli + negara yang tidak beli ---
-    world_map = world.merge(country_info, on="Country", how="left")
-    world_map["Purchased"] = world_map["Purchased"].fillna(0)
+        # --- warna: negara beli = warna atlas, negara lain = abu muda ---
+        world_map["ColorValue"] = world_map["Purchased"].astype(int)
 
-    # --- warna: negara beli = warna atlas, negara lain = abu muda ---
-    world_map["ColorValue"] = world_map["Purchased"].astype(int)
+        fig_atlas = px.choropleth(
+            world_map,
+            locations="Country",
+            locationmode="country names",
+            color="ColorValue",
+            hover_name="Country",
+            hover_data={
+                "TotalRevenue": ":,.0f",
+                "TransactionCount": ":,",
+                "Purchased": False,
+                "ColorValue": False
+            },
+            color_continuous_scale=["#d3d3d3", "#ff9933"],  # abu → oranye atlas
+        )
 
-    # --- CHOROPLETH ATLAS MAP ---
-    fig_atlas = px.choropleth(
-        world_map,
-        locations="Country",
-        locationmode="country names",
-        color="ColorValue",
-        hover_name="Country",
-        hover_data={
-            "TotalRevenue": ":,.0f",
-            "TransactionCount": ":,",
-            "Purchased": False,
-            "ColorValue": False
-        },
-        color_continuous_scale=["#d3d3d3", "#ff9933"],  # abu → oranye atlas
-    )
+        # --- STYLE SEPERTI ATLAS ---
+        fig_atlas.update_geos(
+            showcountries=True,
+            showcoastlines=True,
+            showland=True,
+            landcolor="white",
+            oceancolor="#f8f8f8",
+            lakecolor="#f8f8f8",
+            projection_type="natural earth"
+        )
 
-    # --- STYLE SEPERTI ATLAS ---
-    fig_atlas.update_geos(
-        showcountries=True,
-        showcoastlines=True,
-        showland=True,
-        landcolor="white",
-        oceancolor="#f8f8f8",
-        lakecolor="#f8f8f8",
-        projection_type="natural earth"
-    )
+        fig_atlas.update_layout(
+            height=700,
+            width=1500,
+            coloraxis_showscale=False,   # sembunyikan legend warna
+            title="Peta Persebaran Pelanggan Secara Global",
+            margin=dict(l=20, r=20, t=60, b=20)
+        )
+        return fig_atlas
 
-    fig_atlas.update_layout(
-        height=700,
-        width=1500,
-        coloraxis_showscale=False,   # sembunyikan legend warna
-        title="Peta Persebaran Pelanggan Secara Global",
-        margin=dict(l=20, r=20, t=60, b=20)
-    )
+    fig_atlas = FIGURES.get(("atlas", VIEW_VERSION), build_fig_atlas)
 
     st.plotly_chart(fig_atlas, use_container_width=True)
 
 
 
 #======== TOTAL PEMASUKAN PER NEGARA ============
-    with st.expander("Penjualan Berdasarkan Negara"):
-        # Grouping
-        country = (
-            df.groupby('Country')
-            .agg(TotalRevenue=('TotalAmount', 'sum'),
-                TransactionCount=('TotalAmount', 'count'),
-                TotalQuantity=('Quantity', 'sum'),
-                UniqueInvoices=('InvoiceNo', 'nunique'))
-            .sort_values('TotalRevenue', ascending=False)
-        )
-
-        # Persentase pemasukan
-        country['RevenuePercentage'] = (
-            country['TotalRevenue'] / country['TotalRevenue'].sum() * 100
-        ).round(2)
+    @fragment
+    def show_country_sales():
+        # Grouping (+ persentase pemasukan) dari cube
+        country = country_summary(cube)
 
         # Ambil 5 besar
         top = country.head(5).reset_index()   # <--- PENTING: Country tetap "Country"
@@ -127,26 +355,30 @@ with tab_visualization:
         ]
 
         # Barchart
-        fig = px.bar(
-            top,
-            x="Country",
-            y="TotalRevenue",
-            text="TotalRevenue",
-            color="Country",
-            color_discrete_sequence=PALETTE,
-            title="5 Negara dengan Penjualan Terbesar"
-        )
-
-        # Format Hover + Teks (HASIL PERSENTASE BELUMMM JELAS DAN JELEK MAKANYA DIHAPUS)
-        fig.update_traces(
-            texttemplate='£%{y:,.0f}',
-            textposition='outside',
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Revenue: £%{y:,.0f}<br>" 
-        )
-
-        # Tampilkan chart
+        def build_fig():
+            fig = px.bar(
+                top,
+                x="Country",
+                y="TotalRevenue",
+                text="TotalRevenue",
+                color="Country",
+                color_discrete_sequence=PALETTE,
+                title="5 Negara dengan Penjualan Terbesar"
+            )
+
+            # Format Hover + Teks (HASIL PERSENTASE BELUMMM JELAS DAN JELEK MAKANYA DIHAPUS)
+            fig.update_traces(
+                texttemplate='£%{y:,.0f}',
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Revenue: £%{y:,.0f}<br>" 
+            )
+
+            # Tampilkan chart
+            return fig
+
+        fig = FIGURES.get(("country_sales", VIEW_VERSION), build_fig)
         st.plotly_chart(fig, use_container_width=True)
 
         # Info Negara Terbesar
@@ -160,33 +392,19 @@ with tab_visualization:
             # f"- Share: **{pct:.2f}%**"
         )
 
+    lazy_section("Penjualan Berdasarkan Negara", "country_sales", show_country_sales)
+
     #======== TOTAL PEMASUKAN PER NEGARA (EXCLUDE UK) ============
-    with st.expander("Penjualan Berdasarkan Negara (Tanpa UK)"):
-        # Filter negara
-        df_filtered = df[df['Country'] != 'United Kingdom'].copy()
-
-        # Hitung total amount
-        df_filtered['TotalAmount'] = df_filtered['Quantity'] * df_filtered['UnitPrice']
-
-        # Grouping per negara
-        country = (
-            df_filtered.groupby('Country')
-                .agg(
-                    TotalRevenue=('TotalAmount', 'sum'),
-                    TransactionCount=('TotalAmount', 'count'),
-                    TotalQuantity=('Quantity', 'sum'),
-                    UniqueInvoices=('InvoiceNo', 'nunique')
-                )
-                .sort_values('TotalRevenue', ascending=False)
-        )
-
-        # Persentase revenue
-        country['RevenuePercentage'] = (
-            country['TotalRevenue'] / country['TotalRevenue'].sum() * 100
-        ).round(2)
+    @fragment
+    def show_country_sales_non_uk():
+        # Grouping per negara tanpa UK (+ persentase revenue) dari cube
+        country = country_summary(cube, exclude=['United Kingdom'])
 
         # Ambil 10 teratas
         top = country.head(10).reset_index()
+        if not len(top):
+            st.warning("Tidak ada data negara selain United Kingdom untuk filter ini.")
+            return
 
         # Palet warna
         PALETTE = [
@@ -195,27 +413,31 @@ with tab_visualization:
         ]
 
         # Barchart
-        fig = px.bar(
-            top,
-            x="Country",
-            y="TotalRevenue",
-            text="TotalRevenue",
-            color="Country",
-            color_discrete_sequence=PALETTE,
-            title="Top 10 Negara (Tanpa UK)"
-        )
+        def build_fig():
+            fig = px.bar(
+                top,
+                x="Country",
+                y="TotalRevenue",
+                text="TotalRevenue",
+                color="Country",
+                color_discrete_sequence=PALETTE,
+                title="Top 10 Negara (Tanpa UK)"
+            )
 
-        fig.update_traces(
-            texttemplate='£%{y:,.0f}',
-            textposition='outside',
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Revenue: £%{y:,.0f}<br>"
-        )
+            fig.update_traces(
+                texttemplate='£%{y:,.0f}',
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Revenue: £%{y:,.0f}<br>"
+            )
 
-        fig.update_layout(
-            xaxis_tickangle=-45
-        )
+            fig.update_layout(
+                xaxis_tickangle=-45
+            )
+            return fig
+
+        fig = FIGURES.get(("country_sales_non_uk", VIEW_VERSION), build_fig)
 
         st.plotly_chart(fig, use_container_width=True)
 
@@ -229,34 +451,50 @@ with tab_visualization:
             f"- Total Pemasukan: **£{rev:,.0f}**"
         )
 
+    lazy_section("Penjualan Berdasarkan Negara (Tanpa UK)", "country_sales_non_uk", show_country_sales_non_uk)
+
 #======== NEGARA DENGAN PENJUALAN PALING SEDIKIT ============
-    with st.expander("Negara dengan Penjualan Paling Sedikit"):
-        # Ambil 10 negara terbawah berdasarkan TotalRevenue
+    @fragment
+    def show_country_bottom():
+        # Ambil 5 negara terbawah (tanpa UK) berdasarkan TotalRevenue
         bottom = (
-            country
+            country_summary(cube, exclude=['United Kingdom'])
             .sort_values('TotalRevenue', ascending=True)
             .head(5)
             .reset_index()
         )
+        if not len(bottom):
+            st.warning("Tidak ada data negara selain United Kingdom untuk filter ini.")
+            return
+
+        # Palet warna
+        PALETTE = [
+            "#FF8C00", "#FFA733", "#FFA726", "#FFB74D", "#FFBE66",
+            "#FFCC80", "#FFD599", "#FFECCC", "#FFF5E6", "#FFE0B2"
+        ]
 
         # Barchart
-        fig_bottom = px.bar(
-            bottom,
-            x="Country",
-            y="TotalRevenue",
-            text="TotalRevenue",
-            color="Country",
-            color_discrete_sequence=PALETTE,  # boleh pakai palet warna yang sama
-            title="5 Negara dengan Penjualan Paling Sedikit"
-        )
+        def build_fig_bottom():
+            fig_bottom = px.bar(
+                bottom,
+                x="Country",
+                y="TotalRevenue",
+                text="TotalRevenue",
+                color="Country",
+                color_discrete_sequence=PALETTE,  # boleh pakai palet warna yang sama
+                title="5 Negara dengan Penjualan Paling Sedikit"
+            )
 
-        fig_bottom.update_traces(
-            texttemplate='£%{y:,.0f}',
-            textposition='outside',
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Revenue: £%{y:,.0f}<br>"
-        )
+            fig_bottom.update_traces(
+                texttemplate='£%{y:,.0f}',
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Revenue: £%{y:,.0f}<br>"
+            )
+            return fig_bottom
+
+        fig_bottom = FIGURES.get(("country_bottom", VIEW_VERSION), build_fig_bottom)
 
         st.plotly_chart(fig_bottom, use_container_width=True)
 
@@ -271,20 +509,15 @@ with tab_visualization:
             # f"- Share: **{low_pct:.2f}%**"
         )
 
+    lazy_section("Negara dengan Penjualan Paling Sedikit", "country_bottom", show_country_bottom)
+
 # ==================== Tren Pendapatan Bulanan =======================
-    with st.expander("Tren Pendapatan Bulanan Tahun 2011-2012"):
-        monthly = (
-            df.groupby('InvoiceYearMonth')
-            .agg(
-                TotalAmount=('TotalAmount', 'sum'),
-                Orders=('InvoiceNo', 'nunique'),
-                Active_Customers=('CustomerID', 'nunique')
-            )
-            .reset_index()
-        )
+    @fragment
+    def show_monthly_trend():
+        monthly = monthly_summary(cube)
 
-        # Konversi ke string agar tampil rapi di plot
-        monthly['InvoiceYearMonth'] = monthly['InvoiceYearMonth'].astype(str)
+        # Kode yyyymm -> label "2010-12" agar tampil rapi di plot
+        monthly['InvoiceYearMonth'] = year_month_labels(monthly['InvoiceYearMonth'])
 
         # Hitung Average Order Value (AOV)
         monthly['AOV'] = monthly['TotalAmount'] / monthly['Orders']
@@ -293,35 +526,39 @@ with tab_visualization:
         LINE_COLOR = "#FF8C00"
 
         # Plotly line chart
-        fig_monthly = px.line(
-            monthly,
-            x="InvoiceYearMonth",
-            y="TotalAmount",
-            markers=True,
-            title="Tren Pendapatan Bulanan Tahun 2011-2012",
-        )
-
-        fig_monthly.update_traces(
-            line=dict(width=3, color=LINE_COLOR),
-            marker=dict(size=8),
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Total Amount: £%{y:,.0f}<br>" +
-                "Orders: %{customdata[0]:,}<br>" +
-                "Active Customers: %{customdata[1]:,}<br>" +
-                "AOV: £%{customdata[2]:,.2f}<extra></extra>",
-            customdata=monthly[['Orders', 'Active_Customers', 'AOV']].values
-        )
-
-        fig_monthly.update_layout(
-            xaxis_title="Month",
-            yaxis_title="Total Amount (£)",
-            xaxis_tickangle=-45,
-            plot_bgcolor="white",
-            height=450,
-        )
-
-        # Tampilkan chart di Streamlit
+        def build_fig_monthly():
+            fig_monthly = px.line(
+                monthly,
+                x="InvoiceYearMonth",
+                y="TotalAmount",
+                markers=True,
+                title=f"Tren Pendapatan Bulanan {monthly['InvoiceYearMonth'].iloc[0]} – {monthly['InvoiceYearMonth'].iloc[-1]}",
+            )
+
+            fig_monthly.update_traces(
+                line=dict(width=3, color=LINE_COLOR),
+                marker=dict(size=8),
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Total Amount: £%{y:,.0f}<br>" +
+                    "Orders: %{customdata[0]:,}<br>" +
+                    "Active Customers: %{customdata[1]:,}<br>" +
+                    "AOV: £%{customdata[2]:,.2f}<extra></extra>",
+                customdata=monthly[['Orders', 'Active_Customers', 'AOV']].values
+            )
+
+            fig_monthly.update_layout(
+                xaxis_title="Month",
+                yaxis_title="Total Amount (£)",
+                xaxis_tickangle=-45,
+                plot_bgcolor="white",
+                height=450,
+            )
+
+            # Tampilkan chart di Streamlit
+            return fig_monthly
+
+        fig_monthly = FIGURES.get(("monthly_trend", VIEW_VERSION), build_fig_monthly)
         st.plotly_chart(fig_monthly, use_container_width=True)
 
         # ============ Insight otomatis ============
@@ -340,68 +577,63 @@ with tab_visualization:
 
         st.info(insight)
 
+    lazy_section("Tren Pendapatan Bulanan", "monthly_trend", show_monthly_trend)
+
 #======== MONTHLY TREND BY COUNTRY ============
-    with st.expander("Tren Pendapatan Bulanan Berdasarkan Negara"):
+    @fragment
+    def show_monthly_trend_country():
         
+        country_monthly = get_country_monthly(cube, VIEW_VERSION)
+
         # Dropdown negara
         selected_country = st.selectbox(
             "Pilih Negara:",
-            sorted(df['Country'].unique()),
+            sorted(country_monthly[1]),
             key="selected_country_monthly"
         )
 
-        # Filter data untuk negara terpilih
-        df_country = df[df['Country'] == selected_country].copy()
-
-        # Pastikan TotalAmount sudah ada (jaga-jaga)
-        df_country['TotalAmount'] = df_country['Quantity'] * df_country['UnitPrice']
+        # Aggregasi bulanan untuk negara terpilih (slice dari indeks per negara,
+        # bulan sudah berupa string dan AOV sudah dihitung)
+        monthly_cty = country_monthly_slice(country_monthly, selected_country)
 
-        # Aggregasi bulanan
-        monthly_cty = (
-            df_country.groupby('InvoiceYearMonth')
-            .agg(
-                TotalAmount=('TotalAmount', 'sum'),
-                Orders=('InvoiceNo', 'nunique'),
-                Active_Customers=('CustomerID', 'nunique')
+        # Plot
+        def build_fig_cty():
+            fig_cty = px.line(
+                monthly_cty,
+                x="InvoiceYearMonth",
+                y="TotalAmount",
+                markers=True,
+                title=f"Tren Pendapatan Bulanan – {selected_country}",
             )
-            .reset_index()
-            .sort_values('InvoiceYearMonth')
-        )
 
-        # Ubah ke string agar tampil rapi
-        monthly_cty['InvoiceYearMonth'] = monthly_cty['InvoiceYearMonth'].astype(str)
+            fig_cty.update_traces(
+                line=dict(width=3, color="#FF8C00"),
+                marker=dict(size=8),
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Total Amount: £%{y:,.0f}<br>" +
+                    "Orders: %{customdata[0]:,}<br>" +
+                    "Active Customers: %{customdata[1]:,}<br>" +
+                    "AOV: £%{customdata[2]:,.2f}<extra></extra>",
+                customdata=monthly_cty[['Orders', 'Active_Customers', 'AOV']].values
+            )
 
-        # Hitung AOV
-        monthly_cty['AOV'] = monthly_cty['TotalAmount'] / monthly_cty['Orders']
+            fig_cty.update_layout(
+                xaxis_title="Month",
+                yaxis_title="Total Amount (£)",
+                xaxis_tickangle=-45,
+                plot_bgcolor="white",
+                height=450,
+            )
+            return fig_cty
 
-        # Plot
-        fig_cty = px.line(
-            monthly_cty,
-            x="InvoiceYearMonth",
-            y="TotalAmount",
-            markers=True,
-            title=f"Tren Pendapatan Bulanan – {selected_country}",
-        )
-
-        fig_cty.update_traces(
-            line=dict(width=3, color="#FF8C00"),
-            marker=dict(size=8),
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Total Amount: £%{y:,.0f}<br>" +
-                "Orders: %{customdata[0]:,}<br>" +
-                "Active Customers: %{customdata[1]:,}<br>" +
-                "AOV: £%{customdata[2]:,.2f}<extra></extra>",
-            customdata=monthly_cty[['Orders', 'Active_Customers', 'AOV']].values
-        )
-
-        fig_cty.update_layout(
-            xaxis_title="Month",
-            yaxis_title="Total Amount (£)",
-            xaxis_tickangle=-45,
-            plot_bgcolor="white",
-            height=450,
+        # Tanpa filter, figure hanya berubah kalau ada delta yang menyentuh negara ini
+        country_version = (
+            VIEW_VERSION
+            if FILTER_ACTIVE
+            else (MANIFEST["base_version"], partition_stamp(MANIFEST, country=selected_country))
         )
+        fig_cty = FIGURES.get(("monthly_trend_country", country_version, selected_country), build_fig_cty)
 
         st.plotly_chart(fig_cty, use_container_width=True)
 
@@ -424,20 +656,15 @@ with tab_visualization:
         else:
             st.warning("Tidak ada data untuk negara ini.")
 
+    lazy_section("Tren Pendapatan Bulanan Berdasarkan Negara", "monthly_trend_country", show_monthly_trend_country)
+
 
 #======== PENJUALAN PRODUK BERDASARKAN REVENUE ============
     st.subheader("ANALISIS PENJUALAN DAN PENDAPATAN BERDASARKAN PRODUK")
-    with st.expander("Penjualan Produk Berdasarkan Revenue"):
-    # --- Agregasi revenue per produk ---
-        product = (
-            df.groupby('Description')
-            .agg(
-                TotalRevenue=('TotalAmount', 'sum'),
-                UniqueInvoices=('InvoiceNo', 'nunique'),
-                AvgPrice=('UnitPrice', 'mean')
-            )
-            .reset_index()
-        )
+    @fragment
+    def show_product_revenue():
+        # --- Agregasi revenue per produk ---
+        product = product_summary(cube)
 
         # Sort berdasarkan revenue terbesar
         product = product.sort_values('TotalRevenue', ascending=False)
@@ -452,32 +679,36 @@ with tab_visualization:
         ]
 
         # --- Barchart Total Revenue ---
-        fig_prod = px.bar(
-            top_prod,
-            x="Description",
-            y="TotalRevenue",
-            text="TotalRevenue",
-            color="Description",
-            color_discrete_sequence=PALETTE,
-            title="Top 10 Produk dengan Revenue Tertinggi"
-        )
+        def build_fig_prod():
+            fig_prod = px.bar(
+                top_prod,
+                x="Description",
+                y="TotalRevenue",
+                text="TotalRevenue",
+                color="Description",
+                color_discrete_sequence=PALETTE,
+                title="Top 10 Produk dengan Revenue Tertinggi"
+            )
 
-        fig_prod.update_traces(
-            texttemplate='£%{y:,.0f}',
-            textposition='outside',
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Total Revenue: £%{y:,.0f}<br>" +
-                "Avg Price: £%{customdata[0]:.2f}<extra></extra>",
-            customdata=top_prod[['AvgPrice']].values
-        )
+            fig_prod.update_traces(
+                texttemplate='£%{y:,.0f}',
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Total Revenue: £%{y:,.0f}<br>" +
+                    "Avg Price: £%{customdata[0]:.2f}<extra></extra>",
+                customdata=top_prod[['AvgPrice']].values
+            )
 
-        fig_prod.update_layout(
-            xaxis_title="Product",
-            yaxis_title="Total Revenue (£)",
-            xaxis_tickangle=-45,
-            showlegend=False
-        )
+            fig_prod.update_layout(
+                xaxis_title="Product",
+                yaxis_title="Total Revenue (£)",
+                xaxis_tickangle=-45,
+                showlegend=False
+            )
+            return fig_prod
+
+        fig_prod = FIGURES.get(("product_revenue", VIEW_VERSION), build_fig_prod)
 
         st.plotly_chart(fig_prod, use_container_width=True)
 
@@ -492,13 +723,15 @@ with tab_visualization:
 
         st.info(summary)
 
+    lazy_section("Penjualan Produk Berdasarkan Revenue", "product_revenue", show_product_revenue)
+
 #======== PENJUALAN PRODUK BERDASARKAN QUANTITY ============
-    with st.expander("Penjualan Produk Berdasarkan Jumlah Produk Terjual"):
+    @fragment
+    def show_product_quantity():
         # --- Hitung total quantity per produk ---
         product_qty = (
-            df.groupby('Description')['Quantity']
-            .sum()
-            .reset_index()
+            product_summary(cube)[['Description', 'TotalQuantity']]
+            .rename(columns={'TotalQuantity': 'Quantity'})
             .sort_values('Quantity', ascending=False)
         )
 
@@ -512,30 +745,34 @@ with tab_visualization:
         ]
 
         # --- Barchart Quantity Terjual ---
-        fig_qty = px.bar(
-            top_qty,
-            x="Description",
-            y="Quantity",
-            text="Quantity",
-            color="Description",
-            color_discrete_sequence=PALETTE,
-            title="Top 10 Produk Berdasarkan Jumlah Quantity Terjual"
-        )
+        def build_fig_qty():
+            fig_qty = px.bar(
+                top_qty,
+                x="Description",
+                y="Quantity",
+                text="Quantity",
+                color="Description",
+                color_discrete_sequence=PALETTE,
+                title="Top 10 Produk Berdasarkan Jumlah Quantity Terjual"
+            )
 
-        fig_qty.update_traces(
-            texttemplate='%{y:,}',
-            textposition='outside',
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Quantity Terjual: %{y:,}<extra></extra>"
-        )
+            fig_qty.update_traces(
+                texttemplate='%{y:,}',
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Quantity Terjual: %{y:,}<extra></extra>"
+            )
 
-        fig_qty.update_layout(
-            xaxis_title="Product",
-            yaxis_title="Quantity Sold",
-            xaxis_tickangle=-45,
-            showlegend=False
-        )
+            fig_qty.update_layout(
+                xaxis_title="Product",
+                yaxis_title="Quantity Sold",
+                xaxis_tickangle=-45,
+                showlegend=False
+            )
+            return fig_qty
+
+        fig_qty = FIGURES.get(("product_quantity", VIEW_VERSION), build_fig_qty)
 
         st.plotly_chart(fig_qty, use_container_width=True)
 
@@ -550,64 +787,36 @@ with tab_visualization:
 
         st.info(summary)
 
-#======== SCATTER PLOT: REVENUE vs QUANTITY (ALL PRODUCTS) ============
-    with st.expander("Persebaran Penjualan Produk Berdasarkan Pendapatan dan Jumlah Produk Terjual"):
-        # --- Buat agregasi revenue & quantity per produk ---
-        product_scatter = (
-            df.groupby('Description')
-            .agg(
-                TotalRevenue=('TotalAmount', 'sum'),
-                TotalQuantity=('Quantity', 'sum'),
-                AvgPrice=('UnitPrice', 'mean')
-            )
-            .reset_index()
-        )
-        
-        product_scatter = product_scatter[product_scatter["TotalRevenue"] > 0]
-
-        # --- Scatter Plot ---
-        fig_scatter = px.scatter(
-            product_scatter,
-            x="TotalQuantity",
-            y="TotalRevenue",
-            hover_name="Description",
-            hover_data={
-                "TotalQuantity": True,
-                "TotalRevenue": ":,.0f",
-                "AvgPrice": ":,.2f"
-            },
-            title="Scatter Plot: Total Revenue vs Quantity per Product",
-        )
+    lazy_section("Penjualan Produk Berdasarkan Jumlah Produk Terjual", "product_quantity", show_product_quantity)
 
-        fig_scatter.update_layout(
-            xaxis_title="Total Quantity Sold",
-            yaxis_title="Total Revenue (£)",
-            height=600,
-            plot_bgcolor="white"
+#======== SCATTER PLOT: REVENUE vs QUANTITY (ALL PRODUCTS) ============
+    @fragment
+    def show_product_scatter():
+        # Katalog besar: scatter dirender WebGL dan titik diringkas per sel grid log-space
+        decimate = st.checkbox(
+            "Ringkas titik (tetap menampilkan outlier)",
+            value=True,
+            key="product_scatter_decimate"
         )
 
-        fig_scatter.update_traces(
-            marker=dict(opacity=0.7, line=dict(width=1, color="black"))
+        fig_scatter = FIGURES.get(
+            ("product_scatter", VIEW_VERSION, decimate),
+            lambda: build_product_scatter_figure(cube, decimate)
         )
 
         # --- Tampilkan chart ---
         st.plotly_chart(fig_scatter, use_container_width=True)
 
+    lazy_section("Persebaran Penjualan Produk Berdasarkan Pendapatan dan Jumlah Produk Terjual", "product_scatter", show_product_scatter)
+
 #======== ANALISIS AKTIVITAS PELANGGAN ============
     st.subheader("ANALISIS AKTIVITAS PELANGGAN")
 
 #======== ANALISIS AKTIVITAS PELANGGAN PER HARI ============   
-    with st.expander("Keaktifan Pelanggan Berdasarkan Hari"):
-        # Urutan hari (biar tidak acak)
-        order_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
-        # Grouping count transaksi per hari
-        day_sales = (
-            df.groupby('DayName')
-            .agg(TransactionCount=('InvoiceNo', 'nunique'))
-            .reindex(order_days)   # pastikan urut
-            .reset_index()
-        )
+    @fragment
+    def show_day_activity():
+        # Jumlah transaksi per hari, urut Senin..Minggu (dari matriks bulan x hari x jam)
+        day_sales = day_summary(cube, LABEL_LOCALE)
         # Palet warna
         PALETTE = [
             "#FF8C00", "#FFA733", "#FFA726", "#FFB74D",
@@ -615,30 +824,34 @@ with tab_visualization:
         ]
 
         # Barchart
-        fig = px.bar(
-            day_sales,
-            x="DayName",
-            y="TransactionCount",
-            text="TransactionCount",
-            color="DayName",
-            color_discrete_sequence=PALETTE,
-            title="Jumlah Transaksi Pelanggan Berdasarkan Hari"
-        )
+        def build_fig():
+            fig = px.bar(
+                day_sales,
+                x="DayName",
+                y="TransactionCount",
+                text="TransactionCount",
+                color="DayName",
+                color_discrete_sequence=PALETTE,
+                title="Jumlah Transaksi Pelanggan Berdasarkan Hari"
+            )
 
-        # Hover + Label
-        fig.update_traces(
-            textposition='outside',
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Transaksi: %{y:,}<extra></extra>"
-        )
+            # Hover + Label
+            fig.update_traces(
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Transaksi: %{y:,}<extra></extra>"
+            )
 
-        # Layout
-        fig.update_layout(
-            xaxis_title="Hari",
-            yaxis_title="Jumlah Transaksi",
-            showlegend=False
-        )
+            # Layout
+            fig.update_layout(
+                xaxis_title="Hari",
+                yaxis_title="Jumlah Transaksi",
+                showlegend=False
+            )
+            return fig
+
+        fig = FIGURES.get(("day_activity", VIEW_VERSION, LABEL_LOCALE), build_fig)
 
         st.plotly_chart(fig, use_container_width=True)
 
@@ -648,62 +861,59 @@ with tab_visualization:
             f"**Hari dengan transaksi terbanyak: `{top_day['DayName']}`**\n"
             f"- Jumlah Transaksi: **{top_day['TransactionCount']:,}**"
         )
+
+    lazy_section("Keaktifan Pelanggan Berdasarkan Hari", "day_activity", show_day_activity)
 #======== ANALISIS AKTIVITAS PER JAM BERDASARKAN HARI ============
-    with st.expander("Keaktifan Pelanggan Berdasarkan Jam & Hari"):
+    @fragment
+    def show_day_hour_activity():
 
-        # Dropdown hari
-        order_days = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+        # Dropdown hari (nilai = kode weekday, label sesuai bahasa)
+        order_days = DAY_LABELS[LABEL_LOCALE]
 
-        selected_day = st.selectbox(
+        selected_day_code = st.selectbox(
             "Pilih Hari:",
-            order_days,
+            range(7),
+            format_func=lambda day: order_days[day],
             key="selected_day_hour"
         )
+        selected_day = order_days[selected_day_code]
 
-        # Filter sesuai hari yang dipilih
-        df_day = df[df['DayName'] == selected_day]
+        # Baris hari terpilih dari matriks hari x jam (jam 0–23 muncul semua)
+        hourly_sales = hourly_summary(cube, selected_day_code)
 
-        # Grouping per jam
-        hourly_sales = (
-            df_day.groupby("Hour")
-            .agg(TransactionCount=('InvoiceNo', 'nunique'))
-            .reset_index()
-        )
+        # Plot line chart
+        def build_fig_hour():
+            fig_hour = px.line(
+                hourly_sales,
+                x="Hour",
+                y="TransactionCount",
+                markers=True,
+                title=f"Trend Jumlah Transaksi per Jam – {selected_day}"
+            )
 
-        # Pastikan jam 0–23 muncul semua
-        import pandas as pd
-        all_hours = pd.DataFrame({"Hour": range(24)})
-        hourly_sales = all_hours.merge(hourly_sales, on="Hour", how="left").fillna(0)
+            fig_hour.update_traces(
+                line=dict(width=3, color="#FF8C00"),
+                marker=dict(size=8),
+                hovertemplate=
+                    "<b>Jam %{x}:00</b><br>" +
+                    "Transaksi: %{y:,}<extra></extra>"
+            )
 
-        # Plot line chart
-        fig_hour = px.line(
-            hourly_sales,
-            x="Hour",
-            y="TransactionCount",
-            markers=True,
-            title=f"Trend Jumlah Transaksi per Jam – {selected_day}"
-        )
-
-        fig_hour.update_traces(
-            line=dict(width=3, color="#FF8C00"),
-            marker=dict(size=8),
-            hovertemplate=
-                "<b>Jam %{x}:00</b><br>" +
-                "Transaksi: %{y:,}<extra></extra>"
-        )
-
-        # Pastikan X-axis menunjukkan semua jam
-        fig_hour.update_layout(
-            xaxis=dict(
-                tickmode='linear',
-                tick0=0,
-                dtick=1  # tampilkan 0–23 tanpa kelipatan
-            ),
-            xaxis_title="Jam",
-            yaxis_title="Jumlah Transaksi",
-            plot_bgcolor="white",
-            height=450
-        )
+            # Pastikan X-axis menunjukkan semua jam
+            fig_hour.update_layout(
+                xaxis=dict(
+                    tickmode='linear',
+                    tick0=0,
+                    dtick=1  # tampilkan 0–23 tanpa kelipatan
+                ),
+                xaxis_title="Jam",
+                yaxis_title="Jumlah Transaksi",
+                plot_bgcolor="white",
+                height=450
+            )
+            return fig_hour
+
+        fig_hour = FIGURES.get(("day_hour_activity", VIEW_VERSION, LABEL_LOCALE, selected_day_code), build_fig_hour)
 
         st.plotly_chart(fig_hour, use_container_width=True)
 
@@ -713,22 +923,14 @@ with tab_visualization:
             f"**Jam paling aktif pada hari {selected_day}: pukul {int(top_hour['Hour'])}:00**\n"
             f"- Total transaksi: **{int(top_hour['TransactionCount']):,}**"
         )
-#======== ANALISIS AKTIVITAS PELANGGAN PER BULAN ============   
-    with st.expander("Keaktifan Pelanggan Berdasarkan Bulan"):
 
-        # Urutan bulan agar rapi
-        order_months = [
-            "January", "February", "March", "April", "May", "June",
-            "July", "August", "September", "October", "November", "December"
-        ]
+    lazy_section("Keaktifan Pelanggan Berdasarkan Jam & Hari", "day_hour_activity", show_day_hour_activity)
+#======== ANALISIS AKTIVITAS PELANGGAN PER BULAN ============   
+    @fragment
+    def show_month_activity():
 
-        # Grouping count transaksi per bulan
-        month_sales = (
-            df.groupby('InvoiceMonthName')
-            .agg(TransactionCount=('InvoiceNo', 'nunique'))
-            .reindex(order_months)     # agar urut
-            .reset_index()
-        )
+        # Jumlah transaksi per bulan, urut Januari..Desember
+        month_sales = month_name_summary(cube, LABEL_LOCALE)
 
         # Warna
         PALETTE = [
@@ -738,31 +940,35 @@ with tab_visualization:
         ]
 
         # Barchart
-        fig_month = px.bar(
-            month_sales,
-            x="InvoiceMonthName",
-            y="TransactionCount",
-            text="TransactionCount",
-            color="InvoiceMonthName",
-            color_discrete_sequence=PALETTE,
-            title="Jumlah Transaksi Pelanggan Berdasarkan Bulan"
-        )
+        def build_fig_month():
+            fig_month = px.bar(
+                month_sales,
+                x="InvoiceMonthName",
+                y="TransactionCount",
+                text="TransactionCount",
+                color="InvoiceMonthName",
+                color_discrete_sequence=PALETTE,
+                title="Jumlah Transaksi Pelanggan Berdasarkan Bulan"
+            )
 
-        # Hover + Label
-        fig_month.update_traces(
-            textposition='outside',
-            hovertemplate=
-                "<b>%{x}</b><br>" +
-                "Transaksi: %{y:,}<extra></extra>"
-        )
+            # Hover + Label
+            fig_month.update_traces(
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Transaksi: %{y:,}<extra></extra>"
+            )
 
-        # Layout
-        fig_month.update_layout(
-            xaxis_title="Bulan",
-            yaxis_title="Jumlah Transaksi",
-            showlegend=False,
-            xaxis_tickangle=-45
-        )
+            # Layout
+            fig_month.update_layout(
+                xaxis_title="Bulan",
+                yaxis_title="Jumlah Transaksi",
+                showlegend=False,
+                xaxis_tickangle=-45
+            )
+            return fig_month
+
+        fig_month = FIGURES.get(("month_activity", VIEW_VERSION, LABEL_LOCALE), build_fig_month)
 
         st.plotly_chart(fig_month, use_container_width=True)
 
@@ -773,7 +979,636 @@ with tab_visualization:
             f"- Jumlah Transaksi: **{top_month['TransactionCount']:,}**"
         )
 
+    lazy_section("Keaktifan Pelanggan Berdasarkan Bulan", "month_activity", show_month_activity)
+
+with tab_rfm:
+#============ RINGKASAN RFM =============
+    st.subheader("ANALISIS RECENCY, FREQUENCY, MONETARY (RFM)")
+
+    if HAS_CUSTOMERS:
+        rfm = get_rfm(state, VIEW_VERSION)
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Jumlah Pelanggan", f"{len(rfm):,}")
+        col2.metric("Rata-rata Recency", f"{rfm['Recency'].mean():,.0f} hari")
+        col3.metric("Rata-rata Frequency", f"{rfm['Frequency'].mean():,.1f} transaksi")
+        col4.metric("Rata-rata Monetary", f"£{rfm['Monetary'].mean():,.0f}")
+    else:
+        rfm = None
+        st.warning(NO_CUSTOMERS_WARNING)
+
+#============ DISTRIBUSI R, F, M =============
+    @fragment
+    def show_rfm_distribution():
+        metric = st.selectbox(
+            "Pilih Metrik:",
+            ["Recency", "Frequency", "Monetary"],
+            key="selected_rfm_metric"
+        )
+
+        def build_fig_dist():
+            fig_dist = px.histogram(
+                rfm,
+                x=metric,
+                nbins=50,
+                log_y=metric != "Recency",   # Frequency & Monetary sangat skewed
+                color_discrete_sequence=["#FF8C00"],
+                title=f"Distribusi {metric} Pelanggan"
+            )
+
+            fig_dist.update_layout(
+                xaxis_title=metric,
+                yaxis_title="Jumlah Pelanggan",
+                plot_bgcolor="white",
+                bargap=0.05
+            )
+            return fig_dist
+
+        fig_dist = FIGURES.get(("rfm_distribution", VIEW_VERSION, metric), build_fig_dist)
+
+        st.plotly_chart(fig_dist, use_container_width=True)
 
+    if HAS_CUSTOMERS:
+        lazy_section("Distribusi Recency, Frequency dan Monetary", "rfm_distribution", show_rfm_distribution)
 
+#============ SEGMEN PELANGGAN =============
+    @fragment
+    def show_rfm_segments():
+        segments = segment_summary(rfm)
+
+        # Palet warna
+        PALETTE = [
+            "#FF8C00", "#FFA733", "#FFA726", "#FFB74D",
+            "#FFBE66", "#FFCC80", "#FFD599"
+        ]
 
+        def build_fig_seg():
+            fig_seg = px.bar(
+                segments,
+                x="Segment",
+                y="Customers",
+                text="Customers",
+                color="Segment",
+                color_discrete_sequence=PALETTE,
+                category_orders={"Segment": SEGMENT_ORDER},
+                title="Jumlah Pelanggan per Segmen RFM"
+            )
+
+            fig_seg.update_traces(
+                textposition='outside',
+                hovertemplate=
+                    "<b>%{x}</b><br>" +
+                    "Pelanggan: %{y:,}<br>" +
+                    "Avg Monetary: £%{customdata[0]:,.0f}<extra></extra>",
+                customdata=segments[['AvgMonetary']].values
+            )
+
+            fig_seg.update_layout(
+                xaxis_title="Segmen",
+                yaxis_title="Jumlah Pelanggan",
+                showlegend=False
+            )
+            return fig_seg
+
+        fig_seg = FIGURES.get(("rfm_segments", VIEW_VERSION), build_fig_seg)
+
+        st.plotly_chart(fig_seg, use_container_width=True)
+
+        st.dataframe(
+            segments.style.format({
+                "AvgRecency": "{:,.0f}",
+                "AvgFrequency": "{:,.1f}",
+                "AvgMonetary": "£{:,.0f}",
+                "TotalMonetary": "£{:,.0f}",
+                "CustomerPercentage": "{:.2f}%"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # Insight segmen terbesar berdasarkan kontribusi revenue
+        top_seg = segments.loc[segments['TotalMonetary'].idxmax()]
+        st.success(
+            f"**Segmen dengan kontribusi pendapatan terbesar: `{top_seg['Segment']}`**\n"
+            f"- Jumlah Pelanggan: **{top_seg['Customers']:,}** ({top_seg['CustomerPercentage']:.2f}%)\n"
+            f"- Total Pemasukan: **£{top_seg['TotalMonetary']:,.0f}**"
+        )
+
+    if HAS_CUSTOMERS:
+        lazy_section("Segmentasi Pelanggan Berdasarkan Skor RFM", "rfm_segments", show_rfm_segments)
+
+#============ TABEL RFM PER PELANGGAN =============
+    @fragment
+    def show_rfm_table():
+        selected_segment = st.selectbox(
+            "Pilih Segmen:",
+            ["Semua"] + SEGMENT_ORDER,
+            key="selected_rfm_segment"
+        )
+
+        rfm_view = rfm if selected_segment == "Semua" else rfm[rfm["Segment"] == selected_segment]
+
+        st.dataframe(
+            rfm_view.sort_values("Monetary", ascending=False)
+            .drop(columns=["LastPurchase"])
+            .head(500),
+            use_container_width=True
+        )
+
+    if HAS_CUSTOMERS:
+        lazy_section("Tabel RFM per Pelanggan", "rfm_table", show_rfm_table)
+
+#============ PERGESERAN SEGMEN (RFM ROLLING) =============
+    @fragment
+    def show_segment_drift():
+        window = st.select_slider(
+            "Window RFM (bulan):",
+            options=[3, 6, 12],
+            value=12,
+            key="drift_window"
+        )
 
+        sizes, migration = get_segment_drift(get_timeline(state, VIEW_VERSION), VIEW_VERSION, window)
+
+        # Ukuran segmen per bulan (pelanggan tidak aktif dalam window tidak ditampilkan)
+        segment_sizes = (
+            sizes.drop(columns=INACTIVE)
+            .reset_index()
+            .melt(id_vars="Month", var_name="Segment", value_name="Customers")
+        )
+
+        PALETTE = [
+            "#FF8C00", "#FFA733", "#FFA726", "#FFB74D",
+            "#FFBE66", "#FFCC80", "#FFD599"
+        ]
+
+        def build_fig_sizes():
+            fig_sizes = px.area(
+                segment_sizes,
+                x="Month",
+                y="Customers",
+                color="Segment",
+                color_discrete_sequence=PALETTE,
+                category_orders={"Segment": SEGMENT_ORDER},
+                title=f"Jumlah Pelanggan per Segmen (RFM {window} Bulan Terakhir)"
+            )
+
+            fig_sizes.update_layout(
+                xaxis_title="Bulan",
+                yaxis_title="Jumlah Pelanggan",
+                xaxis_tickangle=-45,
+                plot_bgcolor="white",
+                height=450
+            )
+            return fig_sizes
+
+        fig_sizes = FIGURES.get(("segment_drift", VIEW_VERSION, window), build_fig_sizes)
+        st.plotly_chart(fig_sizes, use_container_width=True)
+
+        if migration.empty:
+            st.warning("Data kurang dari dua bulan, migrasi segmen belum bisa dihitung.")
+            return
+
+        # Migrasi segmen: bulan sebelumnya -> bulan terpilih
+        months = list(sizes.index[1:])
+        selected_month = st.selectbox(
+            "Migrasi Segmen ke Bulan:",
+            months,
+            index=len(months) - 1,
+            key="drift_month"
+        )
+
+        labels = SEGMENT_ORDER + [INACTIVE]
+        moves = (
+            migration[migration["Month"] == selected_month]
+            .pivot(index="From", columns="To", values="Customers")
+            .reindex(index=labels, columns=labels)
+            .fillna(0)
+            .astype(int)
+        )
+
+        def build_fig_migration():
+            fig_migration = px.imshow(
+                moves,
+                text_auto=True,
+                color_continuous_scale="Oranges",
+                labels=dict(x="Segmen Bulan Ini", y="Segmen Bulan Sebelumnya", color="Pelanggan"),
+                title=f"Migrasi Segmen Pelanggan – {selected_month}"
+            )
+            fig_migration.update_layout(height=550)
+            return fig_migration
+
+        fig_migration = FIGURES.get(
+            ("segment_migration", VIEW_VERSION, window, selected_month), build_fig_migration
+        )
+        st.plotly_chart(fig_migration, use_container_width=True)
+
+        # Insight: pelanggan yang tetap di segmen yang sama vs pindah (di antara yang aktif)
+        active = moves.loc[SEGMENT_ORDER, SEGMENT_ORDER].to_numpy()
+        stayed = int(active.trace())
+        moved = int(active.sum()) - stayed
+        churned = int(moves.loc[SEGMENT_ORDER, INACTIVE].sum())
+        st.info(
+            f"**Migrasi ke `{selected_month}` (window {window} bulan)**\n"
+            f"- Tetap di segmen yang sama: **{stayed:,}** pelanggan\n"
+            f"- Pindah segmen: **{moved:,}** pelanggan\n"
+            f"- Keluar dari window (tidak aktif): **{churned:,}** pelanggan"
+        )
+
+    if HAS_CUSTOMERS:
+        lazy_section("Pergeseran Segmen Pelanggan (RFM Rolling)", "segment_drift", show_segment_drift)
+
+#============ RETENSI COHORT =============
+    @fragment
+    def show_cohort_retention():
+        cohorts = get_cohorts(get_timeline(state, VIEW_VERSION), VIEW_VERSION)
+
+        metric = st.radio(
+            "Tampilkan:",
+            ["Retensi (%)", "Revenue (£)"],
+            horizontal=True,
+            key="cohort_metric"
+        )
+        if metric == "Retensi (%)":
+            matrix = (cohorts.retention * 100).round(1)
+        else:
+            matrix = cohorts.revenue.round(0)
+
+        def build_fig_cohort():
+            fig_cohort = px.imshow(
+                matrix,
+                text_auto=True,
+                aspect="auto",
+                color_continuous_scale="Oranges",
+                labels=dict(x="Bulan ke- (sejak pembelian pertama)", y="Cohort (bulan pertama)", color=metric),
+                title=f"Cohort Pelanggan – {metric}"
+            )
+            fig_cohort.update_layout(height=600, plot_bgcolor="white")
+            return fig_cohort
+
+        fig_cohort = FIGURES.get(("cohort", VIEW_VERSION, metric), build_fig_cohort)
+        st.plotly_chart(fig_cohort, use_container_width=True)
+
+        # Insight: rata-rata retensi bulan pertama setelah akuisisi (berbobot ukuran cohort)
+        if cohorts.active.shape[1] > 1:
+            month1 = cohorts.active[1].notna()
+            avg_retention = cohorts.active.loc[month1, 1].sum() / cohorts.sizes[month1].sum() * 100
+            largest = cohorts.sizes.idxmax()
+            st.info(
+                f"**Cohort terbesar: `{largest}`** ({cohorts.sizes.max():,} pelanggan baru)\n"
+                f"- Rata-rata retensi bulan ke-1: **{avg_retention:.1f}%**"
+            )
+
+    if HAS_CUSTOMERS:
+        lazy_section("Retensi Cohort Pelanggan", "cohort_retention", show_cohort_retention)
+
+#============ PENCARIAN PELANGGAN / PRODUK =============
+    @fragment
+    def show_search():
+        index = get_search_index(DATA_VERSION)
+
+        mode = st.radio("Cari berdasarkan:", ["CustomerID", "Produk"], horizontal=True, key="search_mode")
+        query = st.text_input(
+            "Ketik CustomerID atau awal CustomerID:" if mode == "CustomerID" else "Ketik nama / potongan nama produk:",
+            key="search_query"
+        )
+        if not query.strip():
+            return
+
+        if mode == "CustomerID":
+            matches = match_customers(index, query)
+            if not matches:
+                st.warning("CustomerID tidak ditemukan.")
+                return
+            customer_id = query.strip() if query.strip() in matches else st.selectbox(
+                "Pilih CustomerID:", matches, key="search_customer"
+            )
+
+            # Skor RFM + segmen pelanggan
+            if rfm is not None and customer_id in rfm.index:
+                row = rfm.loc[customer_id]
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Segmen", str(row["Segment"]))
+                col2.metric("Recency", f"{row['Recency']:,} hari", f"R{row['R_Score']}", delta_color="off")
+                col3.metric("Frequency", f"{row['Frequency']:,} transaksi", f"F{row['F_Score']}", delta_color="off")
+                col4.metric("Monetary", f"£{row['Monetary']:,.0f}", f"M{row['M_Score']}", delta_color="off")
+
+            # Riwayat invoice (ringkas) + detail baris
+            lines = customer_lines(index, customer_id)
+            if FILTER_ACTIVE:
+                lines = filter_lines(lines, FILTER_START, FILTER_END, FILTER_COUNTRIES)
+            st.dataframe(
+                invoice_history(lines).style.format({"TotalAmount": "£{:,.2f}"}),
+                use_container_width=True,
+                hide_index=True
+            )
+            with st.expander(f"Detail {len(lines):,} baris transaksi"):
+                st.dataframe(lines, use_container_width=True, hide_index=True)
+        else:
+            matches = match_descriptions(index, query)
+            if not matches:
+                st.warning("Produk tidak ditemukan.")
+                return
+
+            products = product_summary(cube).astype({"Description": str}).set_index("Description")
+            found = products.reindex(matches).dropna(how="all").reset_index()
+            st.dataframe(
+                found.style.format({
+                    "TotalRevenue": "£{:,.0f}",
+                    "TotalQuantity": "{:,.0f}",
+                    "UniqueInvoices": "{:,.0f}",
+                    "AvgPrice": "£{:,.2f}"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+
+    lazy_section("Cari Pelanggan / Produk", "search", show_search)
+
+with tab_clustering:
+#============ MENENTUKAN JUMLAH CLUSTER =============
+    st.subheader("CLUSTERING PELANGGAN BERDASARKAN RFM (MINIBATCH K-MEANS)")
+
+    rfm = get_rfm(state, VIEW_VERSION) if HAS_CUSTOMERS else None
+
+    # Filter bisa menyisakan sedikit pelanggan: k dibatasi jumlah pelanggan - 1
+    CLUSTERABLE = N_CUSTOMERS >= 3
+    MAX_K = min(K_RANGE.stop - 1, N_CUSTOMERS - 1)
+    if not HAS_CUSTOMERS:
+        st.warning(NO_CUSTOMERS_WARNING)
+    elif not CLUSTERABLE:
+        st.warning("Pelanggan terlalu sedikit untuk clustering (minimal 3) pada filter ini.")
+
+    @fragment
+    def show_k_selection():
+        X = get_features(rfm, VIEW_VERSION)
+        sweep = get_k_sweep(X, VIEW_VERSION)
+
+        col1, col2 = st.columns(2)
+
+        def build_fig_elbow():
+            fig_elbow = px.line(
+                sweep,
+                x="k",
+                y="Inertia",
+                markers=True,
+                title="Elbow Method (Inertia)"
+            )
+            fig_elbow.update_traces(line=dict(width=3, color="#FF8C00"), marker=dict(size=8))
+            fig_elbow.update_layout(xaxis=dict(tickmode='linear', dtick=1), plot_bgcolor="white")
+            return fig_elbow
+
+        fig_elbow = FIGURES.get(("k_elbow", VIEW_VERSION), build_fig_elbow)
+        col1.plotly_chart(fig_elbow, use_container_width=True)
+
+        def build_fig_sil():
+            fig_sil = px.line(
+                sweep,
+                x="k",
+                y="Silhouette",
+                markers=True,
+                title="Silhouette Score"
+            )
+            fig_sil.update_traces(line=dict(width=3, color="#FF8C00"), marker=dict(size=8))
+            fig_sil.update_layout(xaxis=dict(tickmode='linear', dtick=1), plot_bgcolor="white")
+            return fig_sil
+
+        fig_sil = FIGURES.get(("k_silhouette", VIEW_VERSION), build_fig_sil)
+        col2.plotly_chart(fig_sil, use_container_width=True)
+
+        best_k = sweep.loc[sweep['Silhouette'].idxmax()]
+        st.info(
+            f"**k dengan silhouette tertinggi: `{int(best_k['k'])}`**\n"
+            f"- Silhouette: **{best_k['Silhouette']:.3f}** (dihitung pada sampel pelanggan)"
+        )
+
+    if CLUSTERABLE:
+        lazy_section("Menentukan Jumlah Cluster (Elbow & Silhouette)", "k_selection", show_k_selection)
+
+#============ PROFIL CLUSTER =============
+    if CLUSTERABLE and MAX_K > K_RANGE.start:
+        # k terpilih sebelumnya bisa melebihi batas baru setelah filter diganti
+        if st.session_state.get("selected_k", K_RANGE.start) > MAX_K:
+            del st.session_state["selected_k"]
+        k = st.slider("Jumlah Cluster (k):", min_value=K_RANGE.start, max_value=MAX_K, value=min(4, MAX_K), key="selected_k")
+    else:
+        k = K_RANGE.start
+
+    @fragment
+    def show_cluster_profile():
+        model = get_kmeans(get_features(rfm, VIEW_VERSION), VIEW_VERSION, k)
+        profile = cluster_profile(rfm, model.labels_)
+
+        # Palet warna
+        PALETTE = [
+            "#FF8C00", "#FFA733", "#FFA726", "#FFB74D", "#FFBE66",
+            "#FFCC80", "#FFD599", "#FFECCC", "#FFF5E6", "#FFE0B2"
+        ]
+
+        def build_fig_cluster():
+            fig_cluster = px.bar(
+                profile.astype({"Cluster": str}),
+                x="Cluster",
+                y="Customers",
+                text="Customers",
+                color="Cluster",
+                color_discrete_sequence=PALETTE,
+                title=f"Jumlah Pelanggan per Cluster (k={k})"
+            )
+
+            fig_cluster.update_traces(
+                textposition='outside',
+                hovertemplate=
+                    "<b>Cluster %{x}</b><br>" +
+                    "Pelanggan: %{y:,}<br>" +
+                    "Avg Recency: %{customdata[0]:,.0f} hari<br>" +
+                    "Avg Frequency: %{customdata[1]:,.1f}<br>" +
+                    "Avg Monetary: £%{customdata[2]:,.0f}<extra></extra>",
+                customdata=profile[['AvgRecency', 'AvgFrequency', 'AvgMonetary']].values
+            )
+
+            fig_cluster.update_layout(
+                xaxis_title="Cluster",
+                yaxis_title="Jumlah Pelanggan",
+                showlegend=False
+            )
+            return fig_cluster
+
+        fig_cluster = FIGURES.get(("cluster_profile", VIEW_VERSION, k), build_fig_cluster)
+
+        st.plotly_chart(fig_cluster, use_container_width=True)
+
+        st.dataframe(
+            profile.style.format({
+                "AvgRecency": "{:,.0f}",
+                "AvgFrequency": "{:,.1f}",
+                "AvgMonetary": "£{:,.0f}",
+                "TotalMonetary": "£{:,.0f}",
+                "CustomerPercentage": "{:.2f}%"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    if CLUSTERABLE:
+        lazy_section("Profil Cluster Pelanggan", "cluster_profile", show_cluster_profile, expanded=True)
+
+#============ PERSEBARAN CLUSTER =============
+    @fragment
+    def show_cluster_scatter():
+        model = get_kmeans(get_features(rfm, VIEW_VERSION), VIEW_VERSION, k)
+
+        # Sampel supaya scatter tetap ringan di browser
+        cluster_scatter = rfm.assign(Cluster=model.labels_.astype(str))
+        if len(cluster_scatter) > 5000:
+            cluster_scatter = cluster_scatter.sample(5000, random_state=42)
+
+        def build_fig_rm():
+            fig_rm = px.scatter(
+                cluster_scatter.reset_index(),
+                x="Recency",
+                y="Monetary",
+                color="Cluster",
+                hover_name="CustomerID",
+                hover_data={"Frequency": True, "Monetary": ":,.0f"},
+                log_y=True,
+                title="Recency vs Monetary per Cluster (sampel 5.000 pelanggan)"
+            )
+
+            fig_rm.update_layout(
+                xaxis_title="Recency (hari)",
+                yaxis_title="Monetary (£, skala log)",
+                height=600,
+                plot_bgcolor="white"
+            )
+            return fig_rm
+
+        fig_rm = FIGURES.get(("cluster_scatter", VIEW_VERSION, k), build_fig_rm)
+
+        st.plotly_chart(fig_rm, use_container_width=True)
+
+    if CLUSTERABLE:
+        lazy_section("Persebaran Cluster Berdasarkan Recency dan Monetary", "cluster_scatter", show_cluster_scatter)
+
+with tab_insight:
+#============ MARKET BASKET ANALYSIS =============
+    st.subheader("ASOSIASI PRODUK (MARKET BASKET ANALYSIS)")
+
+    rfm = get_rfm(state, VIEW_VERSION) if HAS_CUSTOMERS else None
+
+    @fragment
+    def show_basket_rules():
+        col1, col2 = st.columns(2)
+        group_label = col1.selectbox(
+            "Kelompokkan Berdasarkan:",
+            ["Segmen RFM", "Negara"],
+            key="selected_basket_group"
+        )
+        min_support = col2.select_slider(
+            "Minimum Support:",
+            options=[0.01, 0.02, 0.03, 0.05, 0.1],
+            value=MIN_SUPPORT,
+            key="selected_min_support"
+        )
+        group_col = "Segment" if group_label == "Segmen RFM" else "Country"
+
+        rules = get_rules(rfm, VIEW_VERSION, group_col, min_support)
+        if rules.empty:
+            st.warning("Tidak ada rule yang memenuhi minimum support ini.")
+            return
+
+        selected_group = st.selectbox(
+            f"Pilih {group_label}:",
+            sorted(rules["Group"].unique()),
+            key="selected_basket_value"
+        )
+        group_rules = rules[rules["Group"] == selected_group].head(20)
+
+        # Barchart lift top 10 rule
+        top_rules = group_rules.head(10).assign(
+            Rule=lambda r: r["antecedents"] + " → " + r["consequents"]
+        )
+
+        def build_fig_rules():
+            fig_rules = px.bar(
+                top_rules,
+                x="lift",
+                y="Rule",
+                orientation="h",
+                color_discrete_sequence=["#FF8C00"],
+                title=f"Top 10 Asosiasi Produk – {selected_group}"
+            )
+
+            fig_rules.update_traces(
+                hovertemplate=
+                    "<b>%{y}</b><br>" +
+                    "Lift: %{x:.2f}<br>" +
+                    "Confidence: %{customdata[0]:.1%}<br>" +
+                    "Support: %{customdata[1]:.1%}<extra></extra>",
+                customdata=top_rules[['confidence', 'support']].values
+            )
+
+            fig_rules.update_layout(
+                xaxis_title="Lift",
+                yaxis_title="",
+                yaxis=dict(autorange="reversed"),
+                plot_bgcolor="white",
+                height=500
+            )
+            return fig_rules
+
+        fig_rules = FIGURES.get(("basket_rules", VIEW_VERSION, group_col, min_support, selected_group), build_fig_rules)
+
+        st.plotly_chart(fig_rules, use_container_width=True)
+
+        st.dataframe(
+            group_rules.drop(columns=["Group", "Invoices"]).style.format({
+                "support": "{:.2%}",
+                "confidence": "{:.2%}",
+                "lift": "{:.2f}"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        best = group_rules.iloc[0]
+        st.info(
+            f"**Asosiasi terkuat untuk `{selected_group}`:**\n"
+            f"- Pembeli **{best['antecedents']}** cenderung juga membeli **{best['consequents']}**\n"
+            f"- Lift: **{best['lift']:.2f}**, Confidence: **{best['confidence']:.1%}**"
+        )
+
+    if HAS_CUSTOMERS:
+        lazy_section("Asosiasi Produk per Segmen / Negara", "basket_rules", show_basket_rules)
+    else:
+        st.warning(NO_CUSTOMERS_WARNING)
+
+# === Debug: Panel Timing ===
+# Dirender paling akhir supaya stage dari rerun ini ikut tampil
+if DEBUG_TIMING:
+    with st.sidebar:
+        st.subheader("Timing")
+        st.caption(f"Rerun terakhir: {time.perf_counter() - RUN_STARTED:.2f}s")
+        summary = PROFILER.summary()
+        if summary.empty:
+            st.info("Belum ada stage tercatat (semua dari cache).")
+        else:
+            st.dataframe(summary.round(4), use_container_width=True)
+        st.caption("Figure cache: " + ", ".join(f"{k}={v:,}" for k, v in FIGURES.stats().items()))
+
+        # Data bersama (cache_resource): satu salinan per proses, bukan per sesi
+        st.subheader("Memori data bersama")
+        st.dataframe(
+            memory_footprint(
+                cube=state["cube"],
+                rfm_state=state["rfm_state"],
+                month_customers=state["month_customers"],
+                rfm=get_rfm(state, VIEW_VERSION) if HAS_CUSTOMERS else None,
+            ),
+            use_container_width=True,
+        )
+        st.download_button(
+            "Export JSON", PROFILER.to_json(), file_name="timing.json", mime="application/json"
+        )
+        if st.button("Reset timing"):
+            PROFILER.clear()
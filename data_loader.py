@@ -0,0 +1,247 @@
+import glob
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from distinct import hash_keys
+from profiling import timed
+
+# Satu file CSV, direktori berisi *.csv (mis. export bulanan), atau pola glob
+DATA_PATH = os.environ.get("DASHBOARD_DATA", "OnlineRetail.csv")
+CACHE_DIR = ".cache"
+CHUNK_SIZE = 250_000
+
+# Naikkan setiap kali output clean_transactions / isi state berubah: sidecar / state lama otomatis invalid
+SCHEMA_VERSION = 7
+
+# Format InvoiceDate di export OnlineRetail (mis. "12/1/2010 8:26")
+DATE_FORMAT = "%m/%d/%Y %H:%M"
+
+# Tipe kolom saat membaca CSV.
+# Quantity / UnitPrice tetap dibaca sebagai string supaya baris rusak bisa di-coerce
+# jadi NaN lalu dibuang (aturan cleaning sama seperti sebelumnya). InvoiceDate dibaca
+# categorical: satu invoice = satu timestamp, jadi tiap string unik cukup di-parse sekali.
+# Kolom teks lain juga categorical: kamus string + kode integer (int16/int32), bukan
+# satu objek Python per baris.
+RAW_DTYPES = {
+    "InvoiceNo": "category",
+    "StockCode": "category",
+    "Description": "category",
+    "Quantity": str,
+    "InvoiceDate": "category",
+    "UnitPrice": str,
+    "CustomerID": "category",
+    "Country": "category",
+}
+
+
+def source_files(path=DATA_PATH):
+    """File CSV sumber: path itu sendiri, semua *.csv di direktori, atau hasil pola glob (urut)."""
+    if os.path.isdir(path):
+        files = glob.glob(os.path.join(path, "*.csv"))
+    elif any(ch in path for ch in "*?["):
+        files = glob.glob(path)
+    else:
+        return [path]
+
+    if not files:
+        raise FileNotFoundError(f"Tidak ada file CSV untuk {path}")
+    return sorted(files)
+
+
+def dataset_version(path=DATA_PATH):
+    """Kunci versi dataset: ukuran + mtime semua file sumber.
+
+    File ditambah / dihapus / diubah di direktori atau glob -> versi berubah.
+    """
+    files = source_files(path)
+    stamp = "".join(
+        f"|{os.path.abspath(file)}|{stat.st_size}|{stat.st_mtime_ns}"
+        for file, stat in ((file, os.stat(file)) for file in files)
+    )
+    return hashlib.sha1(f"{SCHEMA_VERSION}{stamp}".encode()).hexdigest()[:16]
+
+
+def content_hash(path):
+    """SHA-1 isi file saja (tanpa path / stat): salinan atau file yang di-touch tetap sama."""
+    key = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            key.update(block)
+    return key.hexdigest()
+
+
+@timed("read_csv", rows="result")
+def read_raw(path=DATA_PATH):
+    return pd.read_csv(path, encoding="latin1", dtype=RAW_DTYPES, low_memory=False)
+
+
+def iter_raw_chunks(path=DATA_PATH, chunksize=CHUNK_SIZE):
+    """Baca CSV per chunk tanpa memotong invoice.
+
+    Baris-baris invoice terakhir di tiap chunk ditahan dan digabung ke chunk berikutnya,
+    jadi satu invoice (dan duplikat barisnya) selalu berada di satu chunk.
+    """
+    carry = None
+    reader = pd.read_csv(path, encoding="latin1", dtype=RAW_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        if carry is not None:
+            chunk = concat_transactions([carry, chunk])
+
+        invoices = chunk["InvoiceNo"].cat.codes.to_numpy()
+        other = np.flatnonzero(invoices != invoices[-1])
+        cut = other[-1] + 1 if len(other) else 0
+
+        if cut:
+            yield chunk.iloc[:cut]
+        carry = chunk.iloc[cut:]
+
+    if carry is not None and len(carry):
+        yield carry
+
+
+def iter_clean_chunks(path=DATA_PATH, chunksize=CHUNK_SIZE):
+    """Chunk transaksi yang sudah di-clean (aturan sama dengan clean_transactions)."""
+    for raw in iter_raw_chunks(path, chunksize):
+        chunk = clean_transactions(raw)
+        if len(chunk):
+            yield chunk
+
+
+@timed("clean")
+def clean_transactions(raw):
+    """Dedupe, konversi numerik, buang baris rusak, lalu hitung TotalAmount."""
+    # Konversi ke numerik
+    quantity = pd.to_numeric(raw["Quantity"], errors="coerce")
+    unit_price = pd.to_numeric(raw["UnitPrice"], errors="coerce")
+
+    # Duplikat + baris rusak dibuang dengan satu mask: frame hanya di-copy sekali.
+    # copy(deep=False) cukup karena kolom yang diubah di bawah diganti utuh, bukan di-edit.
+    keep = (~raw.duplicated() & quantity.notna() & unit_price.notna()).to_numpy()
+    df = raw.loc[keep].copy(deep=False)
+    quantity = quantity[keep]
+    unit_price = unit_price[keep]
+
+    # TotalAmount dihitung di float64 supaya total revenue tetap presisi
+    df["TotalAmount"] = quantity * unit_price
+    df["Quantity"] = quantity.astype("int32")
+    df["UnitPrice"] = unit_price.astype("float32")
+    df["InvoiceDate"] = parse_invoice_dates(df["InvoiceDate"])
+
+    # Key integer untuk distinct count (jauh lebih cepat dari nunique pada string).
+    # Berbasis hash, jadi stabil lintas chunk / delta.
+    df["InvoiceKey"] = hash_keys(df["InvoiceNo"])
+    df["CustomerKey"] = hash_keys(df["CustomerID"])
+
+    # reset_index(drop=True) akan meng-copy seluruh data; cukup ganti index-nya
+    df.index = pd.RangeIndex(len(df))
+    return df
+
+
+def parse_invoice_dates(values):
+    """Parse InvoiceDate dengan format tetap; tiap string unik hanya di-parse sekali."""
+    values = values.astype("category")
+    categories = values.cat.categories.astype(str)
+    try:
+        parsed = pd.to_datetime(categories, format=DATE_FORMAT)
+    except (ValueError, TypeError):
+        # Export dengan format lain (mis. ISO): inferensi format, tetap per nilai unik
+        parsed = pd.to_datetime(categories)
+
+    dates = parsed.take(values.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(dates, index=values.index, name=values.name)
+
+
+@timed("calendar_columns")
+def add_calendar_columns(df):
+    """Kolom kalender sebagai kode integer kecil; label hari / bulan baru dipetakan saat render.
+
+    InvoiceYearMonth : int32 yyyymm (201012 = Desember 2010), urut sesuai waktu;
+                       bulan 1..12 = InvoiceYearMonth % 100
+    Weekday          : int8, Senin = 0
+    Hour             : int8 0..23
+    """
+    dates = df["InvoiceDate"].dt
+    df["InvoiceYearMonth"] = (dates.year * 100 + dates.month).astype("int32")
+    df["Weekday"] = dates.weekday.astype("int8")
+    df["Hour"] = dates.hour.astype("int8")
+    return df
+
+
+def concat_transactions(parts):
+    """Gabungkan beberapa frame transaksi tanpa kehilangan dtype categorical.
+
+    pd.concat mengubah kolom categorical jadi object kalau kategorinya berbeda,
+    jadi kategori disatukan dulu.
+    """
+    parts = [part for part in parts if len(part)] or list(parts[:1])
+    if len(parts) == 1:
+        return parts[0]
+
+    for col in parts[0].columns:
+        if isinstance(parts[0][col].dtype, pd.CategoricalDtype):
+            categories = union_categoricals([part[col] for part in parts]).categories
+            parts = [part.assign(**{col: part[col].cat.set_categories(categories)}) for part in parts]
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def _sidecar_prefix(path):
+    # "<stem>-<hash path absolut>": file bernama sama di direktori lain (exports/*/sales.csv)
+    # punya sidecar sendiri
+    stem = os.path.splitext(os.path.basename(path))[0]
+    path_key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return f"{stem}-{path_key}"
+
+
+def sidecar_path(path, version):
+    return os.path.join(CACHE_DIR, f"{_sidecar_prefix(path)}-{version}.parquet")
+
+
+def _write_sidecar(df, path, version):
+    target = sidecar_path(path, version)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    # Tulis ke file sementara dulu supaya sesi lain tidak membaca file setengah jadi
+    # (nama per proses: worker paralel bisa menulis sidecar yang sama bersamaan)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+
+    # Hapus sidecar lama dari versi file sumber sebelumnya; hanya milik file ini
+    own = re.compile(re.escape(_sidecar_prefix(path)) + r"-[0-9a-f]{16}\.parquet")
+    for name in os.listdir(CACHE_DIR):
+        old = os.path.join(CACHE_DIR, name)
+        if own.fullmatch(name) and old != target:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                # Sudah dihapus proses lain yang memuat file yang sama
+                pass
+
+
+def load_transactions(path=DATA_PATH, use_sidecar=True):
+    """Load transaksi bertipe; CSV hanya di-parse sekali per versi file sumber.
+
+    path boleh direktori / pola glob: semua file sumber dimuat (sidecar per file) lalu digabung.
+    """
+    files = source_files(path)
+    if len(files) > 1:
+        return concat_transactions([load_transactions(file, use_sidecar) for file in files])
+
+    path = files[0]
+    version = dataset_version(path)
+    sidecar = sidecar_path(path, version)
+
+    if use_sidecar and os.path.exists(sidecar):
+        df = pd.read_parquet(sidecar)
+    else:
+        df = clean_transactions(read_raw(path))
+        if use_sidecar:
+            _write_sidecar(df, path, version)
+
+    return add_calendar_columns(df)
@@ -0,0 +1,32 @@
+"""Distinct count cepat berbasis key integer (exact)."""
+import numpy as np
+import pandas as pd
+
+
+def hash_keys(values):
+    """Key int64 deterministik dari nilai string (sama di semua chunk / delta / proses).
+
+    Kolom categorical: hanya kategori yang di-hash, lalu diambil lewat kode (tanpa
+    membuat array object sepanjang kolom). Hasilnya sama dengan hash per nilai.
+    """
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        categories = np.asarray(values.cat.categories, dtype=object)
+        hashed = pd.util.hash_array(np.append(categories, np.nan).astype(object), categorize=False)
+        # Kode -1 (NaN) mengambil elemen terakhir = hash NaN
+        return hashed[values.cat.codes.to_numpy()].view(np.int64)
+
+    values = np.asarray(values, dtype=object)
+    return pd.util.hash_array(values, categorize=True).view(np.int64)
+
+
+def count_distinct(groups, keys, n_groups=None):
+    """Jumlah key unik per grup (exact).
+
+    groups : kode grup int 0..n_groups-1 (mis. dari factorize / ngroup)
+    keys   : key int (mis. InvoiceKey); nilai kosong harus sudah dibuang
+    """
+    key_codes, uniques = pd.factorize(keys)
+    n_keys = max(len(uniques), 1)
+    pairs = np.unique(np.asarray(groups, dtype=np.int64) * n_keys + key_codes)
+    return np.bincount(pairs // n_keys, minlength=n_groups or 0)
+
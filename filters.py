@@ -0,0 +1,91 @@
+"""Filter global (rentang tanggal + negara) di atas store transaksi yang urut per tanggal.
+
+Rentang tanggal = dua binary search (searchsorted) lalu slice iloc, tanpa scan / copy
+seluruh tabel; filter negara hanya dijalankan pada potongan hasil slice.
+"""
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from incremental import build_state
+from profiling import timed
+
+
+@dataclass
+class DateSortedStore:
+    """lines : transaksi urut InvoiceDate; dates : InvoiceDate sebagai int64 (ns) untuk searchsorted."""
+
+    lines: pd.DataFrame
+    dates: np.ndarray
+
+
+@timed("date_store")
+def build_date_store(df):
+    dates = df["InvoiceDate"].to_numpy("datetime64[ns]").view("int64")
+
+    # Export CSV umumnya sudah urut tanggal: sort hanya kalau memang perlu
+    if len(dates) and (np.diff(dates) < 0).any():
+        order = np.argsort(dates, kind="stable")
+        df = df.iloc[order].reset_index(drop=True)
+        dates = dates[order]
+    return DateSortedStore(lines=df, dates=dates)
+
+
+def _day_start_ns(day):
+    return pd.Timestamp(day).normalize().value
+
+
+def date_slice(store, start=None, end=None):
+    """Baris dengan start <= tanggal <= end (inklusif, per hari)."""
+    lo = 0 if start is None else np.searchsorted(store.dates, _day_start_ns(start), side="left")
+    hi = (
+        len(store.dates)
+        if end is None
+        else np.searchsorted(store.dates, _day_start_ns(end) + pd.Timedelta(days=1).value, side="left")
+    )
+    return store.lines.iloc[lo:hi]
+
+
+def filter_lines(lines, start=None, end=None, countries=None):
+    """Filter tanggal / negara untuk potongan kecil yang tidak urut tanggal (mis. riwayat satu customer)."""
+    keep = np.ones(len(lines), dtype=bool)
+    if start is not None:
+        keep &= (lines["InvoiceDate"] >= pd.Timestamp(start).normalize()).to_numpy()
+    if end is not None:
+        keep &= (lines["InvoiceDate"] < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_numpy()
+    if countries:
+        keep &= lines["Country"].isin(countries).to_numpy()
+    return lines[keep]
+
+
+def filter_transactions(store, start=None, end=None, countries=None):
+    lines = date_slice(store, start, end)
+    if countries:
+        lines = lines[lines["Country"].isin(countries).to_numpy()]
+    return lines
+
+
+@timed("filtered_state", rows=None)
+def filtered_state(store, base_version, start=None, end=None, countries=None):
+    """State (cube, RFM, timeline, ...) untuk potongan filter; None kalau tidak ada transaksi."""
+    lines = filter_transactions(store, start, end, countries)
+    if lines.empty:
+        return None
+    return build_state(lines, base_version)
+
+
+def month_bounds(cube):
+    """Tanggal pertama bulan paling awal dan tanggal terakhir bulan paling akhir di cube."""
+    months = cube.activity.index.get_level_values("InvoiceYearMonth")
+    first, last = int(months.min()), int(months.max())
+    start = pd.Timestamp(year=first // 100, month=first % 100, day=1)
+    end = pd.Timestamp(year=last // 100, month=last % 100, day=1) + pd.offsets.MonthEnd(0)
+    return start.date(), end.date()
+
+
+def view_version(version, start, end, countries):
+    """Kunci cache untuk kombinasi (versi dataset, filter); aman dipakai sebagai nama file."""
+    key = f"{start}|{end}|{','.join(sorted(countries))}"
+    return f"{version}-{hashlib.sha1(key.encode()).hexdigest()[:8]}"
@@ -0,0 +1,379 @@
+"""Mode inkremental: tambahkan batch invoice harian tanpa menghitung ulang semuanya.
+
+Pemakaian:
+    python incremental.py build --base "exports/*.csv" --jobs 8   # banyak file, paralel per file
+    python incremental.py append data/invoices-2011-12-10.csv
+"""
+import argparse
+import json
+import os
+import pickle
+
+import pandas as pd
+from joblib import Parallel, delayed
+
+from aggregates import ACTIVITY_KEYS, AggregateCube, build_cube
+from data_loader import (
+    CACHE_DIR,
+    CHUNK_SIZE,
+    DATA_PATH,
+    add_calendar_columns,
+    clean_transactions,
+    concat_transactions,
+    content_hash,
+    dataset_version,
+    iter_clean_chunks,
+    load_transactions,
+    read_raw,
+    source_files,
+)
+from profiling import stage, timed
+from rfm import rfm_state
+from timeline import customer_activity, merge_customer_activity
+
+STORE_DIR = os.path.join(CACHE_DIR, "store")
+MONTH_CUSTOMER_KEYS = ["InvoiceYearMonth", "Country", "CustomerID"]
+
+
+def _store_file(store_dir, name):
+    return os.path.join(store_dir, name)
+
+
+def _atomic_write(path, write):
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def load_manifest(base_path=DATA_PATH, store_dir=STORE_DIR):
+    """Manifest store. Direset kalau file sumber utama (base_path) berubah."""
+    base_version = dataset_version(base_path)
+    path = _store_file(store_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest["base_version"] == base_version:
+            return manifest
+    return {"base_version": base_version, "deltas": [], "partitions": {}}
+
+
+def store_version(base_path=DATA_PATH, store_dir=STORE_DIR):
+    """Versi dataset = versi file utama + jumlah delta yang sudah di-append."""
+    manifest = load_manifest(base_path, store_dir)
+    return f"{manifest['base_version']}-{len(manifest['deltas'])}"
+
+
+def partition_stamp(manifest, country=None, month=None):
+    """Nomor delta terakhir yang menyentuh partisi (bulan, negara).
+
+    Dipakai sebagai kunci cache: agregat negara/bulan lain tidak ikut invalid
+    saat delta hanya berisi negara/bulan tertentu.
+    """
+    stamps = [
+        seq
+        for key, seq in manifest["partitions"].items()
+        if (month is None or key.split("|", 1)[0] == str(month))
+        and (country is None or key.split("|", 1)[1] == country)
+    ]
+    return max(stamps, default=0)
+
+
+def load_store(base_path=DATA_PATH, store_dir=STORE_DIR, n_jobs=-1):
+    """Transaksi lengkap: file utama (atau semua file sumber, paralel) + semua delta yang sudah di-append."""
+    manifest = load_manifest(base_path, store_dir)
+    files = source_files(base_path)
+    if len(files) == 1:
+        parts = [load_transactions(files[0])]
+    else:
+        parts = Parallel(n_jobs=n_jobs)(delayed(load_transactions)(file) for file in files)
+    for delta in manifest["deltas"]:
+        parts.append(add_calendar_columns(pd.read_parquet(_store_file(store_dir, delta["file"]))))
+    return concat_transactions(parts)
+
+
+def customer_months(df):
+    """Triple unik (bulan, negara, customer) -> dasar hitung Active_Customers."""
+    triples = df.loc[df["CustomerID"].notna(), MONTH_CUSTOMER_KEYS].drop_duplicates()
+    return triples.astype({"Country": str, "CustomerID": str}).reset_index(drop=True)
+
+
+def merge_rfm_state(state, delta_state):
+    """Merge state RFM per customer; hanya customer yang ada di delta yang disentuh.
+
+    Diasumsikan invoice di delta belum pernah masuk store (dijaga oleh append_delta
+    yang menolak file dengan isi yang sama dua kali, apa pun nama / mtime-nya).
+    """
+    old = state.reindex(delta_state.index)
+    merged = pd.DataFrame(
+        {
+            # max melewati NaT (customer yang di salah satu sisi hanya punya cancel / retur)
+            "LastPurchase": pd.concat([old["LastPurchase"], delta_state["LastPurchase"]], axis=1).max(axis=1),
+            "Frequency": (old["Frequency"].fillna(0) + delta_state["Frequency"]).astype("int32"),
+            "Monetary": old["Monetary"].fillna(0) + delta_state["Monetary"],
+        },
+        index=delta_state.index,
+    )
+
+    existing = merged.index.isin(state.index)
+    state = state.copy()
+    state.loc[merged.index[existing]] = merged[existing]
+    if (~existing).any():
+        state = pd.concat([state, merged[~existing]])
+    return state
+
+
+def merge_month_customers(month_customers, delta_triples):
+    """Tambahkan triple (bulan, negara, customer) baru; return (triples, bulan yang tersentuh)."""
+    months = delta_triples["InvoiceYearMonth"].unique()
+
+    touched = month_customers["InvoiceYearMonth"].isin(months)
+    merged = pd.concat([month_customers[touched], delta_triples]).drop_duplicates()
+    return pd.concat([month_customers[~touched], merged], ignore_index=True), months
+
+
+def merge_cube(cube, delta_cube, month_customers, months):
+    """Cube baru = cube lama + cube delta; customer unik dihitung ulang hanya untuk bulan yang tersentuh."""
+    activity = (
+        pd.concat([cube.activity, delta_cube.activity])
+        .groupby(level=ACTIVITY_KEYS, observed=True)
+        .sum()
+    )
+    products = pd.concat([cube.products, delta_cube.products]).groupby(level="Description", observed=True).sum()
+
+    affected = month_customers[month_customers["InvoiceYearMonth"].isin(months)]
+    customers_touched = affected.groupby(["InvoiceYearMonth", "Country"])["CustomerID"].size()
+    monthly_touched = affected.groupby("InvoiceYearMonth")["CustomerID"].nunique()
+
+    keep = ~cube.customers.index.get_level_values("InvoiceYearMonth").isin(months)
+    customers = pd.concat([cube.customers[keep], customers_touched]).sort_index()
+    monthly_keep = ~cube.monthly_customers.index.isin(months)
+    monthly_customers = pd.concat([cube.monthly_customers[monthly_keep], monthly_touched]).sort_index()
+
+    return AggregateCube(
+        activity=activity,
+        products=products,
+        customers=customers,
+        monthly_customers=monthly_customers,
+        activity_matrix=cube.activity_matrix + delta_cube.activity_matrix,
+    )
+
+
+def build_state(df, base_version):
+    """State lengkap dari satu frame transaksi."""
+    return {
+        "base_version": base_version,
+        "cube": build_cube(df),
+        "rfm_state": rfm_state(df),
+        "month_customers": customer_months(df),
+        "customer_activity": customer_activity(df),
+    }
+
+
+def merge_states(state, other):
+    """Gabungkan dua state parsial (chunk / file / delta); return (state baru, bulan yang tersentuh).
+
+    Diasumsikan satu invoice tidak terpecah di dua state (Frequency dijumlahkan).
+    """
+    month_customers, months = merge_month_customers(state["month_customers"], other["month_customers"])
+    merged = {
+        "base_version": state["base_version"],
+        "cube": merge_cube(state["cube"], other["cube"], month_customers, months),
+        "rfm_state": merge_rfm_state(state["rfm_state"], other["rfm_state"]),
+        "month_customers": month_customers,
+        "customer_activity": merge_customer_activity(state["customer_activity"], other["customer_activity"]),
+    }
+    return merged, months
+
+
+def merge_all(states):
+    """Merge banyak state parsial (urut) jadi satu; None kalau tidak ada.
+
+    Merge berpasangan seperti counter biner: state hanya digabung dengan state berukuran
+    setara, jadi tiap baris agregat ikut O(log n) merge (bukan n merge ke state yang terus
+    membesar) dan paling banyak O(log n) state parsial tertahan di memori.
+    """
+    stack = []  # (level, state); level = log2 jumlah state parsial di dalamnya
+    for state in states:
+        level = 0
+        while stack and stack[-1][0] == level:
+            state, _ = merge_states(stack.pop()[1], state)
+            level += 1
+        stack.append((level, state))
+
+    if not stack:
+        return None
+    state = stack.pop()[1]
+    while stack:
+        state, _ = merge_states(stack.pop()[1], state)
+    return state
+
+
+@timed("merge_state", rows=None)
+def merge_state(state, delta):
+    """Fold satu frame transaksi baru ke state; return (state baru, bulan yang tersentuh)."""
+    return merge_states(state, build_state(delta, state["base_version"]))
+
+
+def stream_state(path=DATA_PATH, base_version=None, chunksize=CHUNK_SIZE):
+    """Bangun state dari CSV per chunk, jadi peak memori dibatasi ukuran chunk + agregat.
+
+    State per chunk di-merge lewat merge_all (berpasangan), bukan satu per satu ke state
+    akumulasi yang terus membesar: biaya merge O(agregat x log jumlah chunk).
+
+    Duplikat hanya dibuang di dalam chunk; karena chunk tidak pernah memotong invoice,
+    duplikat baris dalam satu invoice tetap terbuang.
+    """
+    if base_version is None:
+        base_version = dataset_version(path)
+
+    rows = 0
+
+    def partial_states():
+        nonlocal rows
+        for chunk in iter_clean_chunks(path, chunksize):
+            chunk = add_calendar_columns(chunk)
+            rows += len(chunk)
+            yield build_state(chunk, base_version)
+
+    with stage("stream_state") as s:
+        state = merge_all(partial_states())
+        s.rows = rows
+    return state
+
+
+@timed("ingest_state", rows=None)
+def ingest_state(path=DATA_PATH, base_version=None, n_jobs=-1, chunksize=CHUNK_SIZE):
+    """State dari satu file CSV atau banyak file (direktori / glob).
+
+    Tiap file di-parse, di-clean (aturan sama: dedupe, numerik, buang baris rusak,
+    TotalAmount) dan diringkas jadi state parsial di proses worker terpisah; yang
+    dikirim balik hanya state kecil (cube, state RFM, triple customer), lalu di-merge.
+    Duplikat dibuang per file; invoice diasumsikan tidak terpecah antar file.
+    """
+    if base_version is None:
+        base_version = dataset_version(path)
+
+    files = source_files(path)
+    if len(files) == 1:
+        return stream_state(files[0], base_version, chunksize)
+
+    states = Parallel(n_jobs=n_jobs)(
+        delayed(stream_state)(file, base_version, chunksize) for file in files
+    )
+    return merge_all(partial for partial in states if partial is not None)
+
+
+def _state_path(store_dir, seq):
+    return _store_file(store_dir, f"state-{seq:05d}.pkl")
+
+
+def _save_state(state, store_dir, seq):
+    os.makedirs(store_dir, exist_ok=True)
+
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    _atomic_write(_state_path(store_dir, seq), write)
+
+
+@timed("load_state", rows=None)
+def load_or_build_state(base_path=DATA_PATH, store_dir=STORE_DIR, df=None, n_jobs=-1):
+    """State tersimpan (cube, rfm_state, month_customers, customer_activity) untuk versi store saat ini.
+
+    Kalau belum ada (pertama kali / file utama berubah), dibangun dari df kalau diberikan,
+    atau secara streaming per chunk dari file utama + semua delta.
+    """
+    manifest = load_manifest(base_path, store_dir)
+    seq = len(manifest["deltas"])
+    path = _state_path(store_dir, seq)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state["base_version"] == manifest["base_version"]:
+            return state
+
+    if df is not None:
+        state = build_state(df, manifest["base_version"])
+    else:
+        state = ingest_state(base_path, manifest["base_version"], n_jobs=n_jobs)
+        for delta in manifest["deltas"]:
+            delta_df = add_calendar_columns(pd.read_parquet(_store_file(store_dir, delta["file"])))
+            state, _ = merge_state(state, delta_df)
+    _save_state(state, store_dir, seq)
+    return state
+
+
+def append_delta(delta_path, base_path=DATA_PATH, store_dir=STORE_DIR):
+    """Append satu file CSV delta ke store dan update state RFM + cube secara inkremental."""
+    manifest = load_manifest(base_path, store_dir)
+    source_hash = content_hash(delta_path)
+    if any(d["source_hash"] == source_hash for d in manifest["deltas"]):
+        raise ValueError(f"Delta {delta_path} sudah pernah ditambahkan ke store")
+
+    state = load_or_build_state(base_path, store_dir)
+
+    # Cleaning delta dengan aturan yang sama seperti file utama
+    delta = clean_transactions(read_raw(delta_path))
+    seq = len(manifest["deltas"]) + 1
+    delta_file = f"delta-{seq:05d}.parquet"
+    _atomic_write(_store_file(store_dir, delta_file), lambda tmp: delta.to_parquet(tmp, index=False))
+    delta = add_calendar_columns(delta)
+
+    state, months = merge_state(state, delta)
+    _save_state(state, store_dir, seq)
+
+    # Catat partisi (bulan, negara) yang tersentuh delta ini
+    partitions = delta[["InvoiceYearMonth", "Country"]].drop_duplicates()
+    for month, country in partitions.itertuples(index=False):
+        manifest["partitions"][f"{month}|{country}"] = seq
+    manifest["deltas"].append(
+        {
+            "file": delta_file,
+            "source": os.path.abspath(delta_path),
+            "source_hash": source_hash,
+            "rows": len(delta),
+            "months": sorted(str(m) for m in months),
+        }
+    )
+
+    # Manifest ditulis terakhir: sebelum ini selesai, store tetap di versi lama
+    def write_manifest(tmp):
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    _atomic_write(_store_file(store_dir, "manifest.json"), write_manifest)
+
+    old_state = _state_path(store_dir, seq - 1)
+    if os.path.exists(old_state):
+        os.remove(old_state)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bangun store / append batch invoice baru ke store OnlineRetail.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="bangun state dari file / direktori / glob CSV (paralel per file)")
+    build.add_argument("--base", default=DATA_PATH)
+    build.add_argument("--store", default=STORE_DIR)
+    build.add_argument("--jobs", type=int, default=-1)
+    append = sub.add_parser("append", help="append file CSV delta")
+    append.add_argument("files", nargs="+")
+    append.add_argument("--base", default=DATA_PATH)
+    append.add_argument("--store", default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        files = source_files(args.base)
+        state = load_or_build_state(args.base, args.store, n_jobs=args.jobs)
+        print(f"{len(files)} file, {len(state['rfm_state']):,} pelanggan -> {args.store}")
+        return
+
+    for path in args.files:
+        manifest = append_delta(path, args.base, args.store)
+        delta = manifest["deltas"][-1]
+        print(f"{path}: {delta['rows']:,} baris, bulan {', '.join(delta['months'])}")
+
+
+if __name__ == "__main__":
+    main()
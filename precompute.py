@@ -0,0 +1,167 @@
+"""Precompute artefak dashboard di luar request pengguna (setelah deploy / refresh data).
+
+Pemakaian:
+    python precompute.py                 # state + sidecar bertipe + RFM + clustering default
+    python precompute.py --rules         # + association rules default (per segmen RFM)
+
+Dashboard membaca artefak ini saat start, jadi pengguna pertama tidak menanggung parse +
+agregasi. Dengan DASHBOARD_WARMUP=1, dashboard juga menjalankan start_warmup(): thread
+latar yang mem-precompute versi data baru begitu file sumber / delta berubah.
+"""
+import argparse
+import glob
+import logging
+import os
+import pickle
+import threading
+import time
+
+from basket import MIN_SUPPORT, load_or_mine_rules
+from clustering import fit_kmeans, k_sweep, rfm_features
+from data_loader import CACHE_DIR, DATA_PATH, load_transactions, source_files
+from incremental import STORE_DIR, load_or_build_state, load_store, store_version
+from profiling import stage
+from rfm import rfm_from_state, score_rfm
+
+logger = logging.getLogger("dashboard.precompute")
+
+ARTIFACT_DIR = os.path.join(CACHE_DIR, "artifacts")
+DEFAULT_K = 4
+WARMUP_INTERVAL = 60
+
+# Satu build state per proses dalam satu waktu: kalau thread warm-up sedang membangun,
+# dashboard menunggu lalu membaca hasilnya dari disk, bukan membangun ulang bersamaan
+BUILD_LOCK = threading.Lock()
+
+# Dipegang precompute() selama membangun artefak; _precomputing = versi yang sedang dibangun
+PRECOMPUTE_LOCK = threading.Lock()
+_precomputing = None
+
+
+def artifact_path(version, artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, f"{version}.pkl")
+
+
+def load_artifacts(version, artifact_dir=ARTIFACT_DIR):
+    """Artefak tersimpan untuk versi dataset: dict (rfm, features, k_sweep, kmeans); {} kalau belum ada."""
+    path = artifact_path(version, artifact_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def wait_for_precompute(version):
+    """Tunggu precompute versi ini yang sedang berjalan di proses ini (mis. thread warm-up).
+
+    Return segera kalau tidak ada; setelah return, load_artifacts melihat hasilnya.
+    """
+    if _precomputing == version:
+        with PRECOMPUTE_LOCK:
+            pass
+
+
+def _save_artifacts(artifacts, version, artifact_dir):
+    os.makedirs(artifact_dir, exist_ok=True)
+    target = artifact_path(version, artifact_dir)
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(artifacts, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+
+    # Artefak versi lama tidak akan dibaca lagi
+    for old in glob.glob(os.path.join(artifact_dir, "*.pkl")):
+        if old != target:
+            os.remove(old)
+
+
+def load_state(base_path=DATA_PATH, store_dir=STORE_DIR, n_jobs=-1):
+    """load_or_build_state yang berbagi lock dengan thread warm-up."""
+    with BUILD_LOCK:
+        return load_or_build_state(base_path, store_dir, n_jobs=n_jobs)
+
+
+def precompute(base_path=DATA_PATH, store_dir=STORE_DIR, k=DEFAULT_K, rules=False, n_jobs=-1,
+               artifact_dir=ARTIFACT_DIR):
+    """Bangun semua artefak untuk versi dataset saat ini; return versi tersebut."""
+    global _precomputing
+    version = store_version(base_path, store_dir)
+
+    with PRECOMPUTE_LOCK:
+        _precomputing = version
+        try:
+            with stage("precompute:state"):
+                state = load_state(base_path, store_dir, n_jobs)
+
+            # Sidecar parquet per file dipakai pencarian, filter & basket. Cukup dipanaskan
+            # satu file sekaligus; hasilnya dibuang supaya tabel penuh tidak ditahan di memori
+            with stage("precompute:sidecars"):
+                for file in source_files(base_path):
+                    load_transactions(file)
+
+            with stage("precompute:rfm"):
+                rfm = score_rfm(rfm_from_state(state["rfm_state"]))
+            with stage("precompute:clustering"):
+                X, _ = rfm_features(rfm)
+                artifacts = {
+                    "rfm": rfm,
+                    "features": X,
+                    "k_sweep": k_sweep(X, n_jobs=n_jobs),
+                    "kmeans": {k: fit_kmeans(X, k)},
+                }
+            _save_artifacts(artifacts, version, artifact_dir)
+        finally:
+            _precomputing = None
+
+    if rules:
+        # Default tampilan basket di dashboard: per segmen RFM, MIN_SUPPORT.
+        # Store penuh hanya dimuat kalau rules belum ada di cache
+        def load_segmented():
+            transactions = load_store(base_path, store_dir, n_jobs)
+            return transactions.assign(Segment=transactions["CustomerID"].map(rfm["Segment"]))
+
+        with stage("precompute:rules"):
+            load_or_mine_rules(
+                load_segmented,
+                version,
+                "Segment",
+                MIN_SUPPORT,
+            )
+    return version
+
+
+def start_warmup(base_path=DATA_PATH, store_dir=STORE_DIR, interval=WARMUP_INTERVAL, **kwargs):
+    """Thread daemon: precompute setiap kali versi dataset berubah (dicek tiap `interval` detik)."""
+    def run():
+        done = None
+        while True:
+            try:
+                version = store_version(base_path, store_dir)
+                if version != done and not os.path.exists(artifact_path(version)):
+                    precompute(base_path, store_dir, **kwargs)
+                done = version
+            except Exception:  # thread latar tidak boleh mati karena satu kegagalan
+                logger.exception("Warm-up precompute gagal")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="dashboard-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute artefak dashboard (state, store, RFM, clustering).")
+    parser.add_argument("--base", default=DATA_PATH)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--rules", action="store_true", help="mining association rules default juga")
+    parser.add_argument("--jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    version = precompute(args.base, args.store, k=args.k, rules=args.rules, n_jobs=args.jobs)
+    print(f"Artefak versi {version} siap ({time.perf_counter() - started:.1f}s) -> {ARTIFACT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
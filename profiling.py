@@ -0,0 +1,240 @@
+"""Instrumentasi ringan: waktu, jumlah baris dan delta memori per stage pipeline / section.
+
+Mati secara default; overhead saat mati hanya satu lookup thread-local per stage.
+Aktifkan per sesi dari sidebar debug dashboard (activate), atau untuk seluruh proses
+dengan environment variable DASHBOARD_PROFILE=1 (mis. saat menjalankan CLI / benchmark).
+
+    with stage("build_cube", rows=len(df)):
+        ...
+
+    @timed("clean")
+    def clean_transactions(raw): ...
+"""
+import dataclasses
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("dashboard.profiling")
+
+MAX_RECORDS = 2_000
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def _rss_bytes():
+    # Resident memory proses saat ini (Linux: /proc/self/statm); None kalau tidak tersedia
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _NullStage:
+    """Stage kosong yang dipakai saat instrumentasi mati."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "rows", "_started", "_rss", "_parent")
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self._parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self._rss = _rss_bytes()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started
+        rss = _rss_bytes()
+        self.profiler._stack().pop()
+        self.profiler.record({
+            "stage": self.name,
+            "parent": self._parent,
+            "seconds": round(seconds, 6),
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows / seconds) if self.rows and seconds > 0 else None,
+            "mem_delta_mb": round((rss - self._rss) / 2**20, 2) if rss is not None and self._rss is not None else None,
+            "error": exc_type.__name__ if exc_type else None,
+            "at": time.time(),
+        })
+        return False
+
+
+class Profiler:
+    """Kumpulan record stage (dibatasi MAX_RECORDS, yang paling lama dibuang)."""
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def stage(self, name, rows=None):
+        return _Stage(self, name, rows)
+
+    def record(self, entry):
+        with self._lock:
+            self.records.append(entry)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(entry))
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def to_frame(self):
+        with self._lock:
+            return pd.DataFrame(list(self.records))
+
+    def summary(self):
+        """Total / rata-rata / maksimum waktu per stage, urut dari yang paling lama."""
+        df = self.to_frame()
+        if df.empty:
+            return df
+        return (
+            df.groupby("stage")
+            .agg(
+                Calls=("seconds", "size"),
+                TotalSeconds=("seconds", "sum"),
+                MeanSeconds=("seconds", "mean"),
+                MaxSeconds=("seconds", "max"),
+                Rows=("rows", "max"),
+                MemDeltaMB=("mem_delta_mb", "sum"),
+            )
+            .sort_values("TotalSeconds", ascending=False)
+        )
+
+    def to_json(self):
+        with self._lock:
+            return json.dumps(list(self.records), indent=2)
+
+
+# Profiler aktif per thread (tiap sesi Streamlit berjalan di thread sendiri);
+# DASHBOARD_PROFILE=1 memberi profiler default untuk semua thread di proses
+_DEFAULT = Profiler() if os.environ.get("DASHBOARD_PROFILE") else None
+_current = threading.local()
+
+
+def current():
+    return getattr(_current, "profiler", _DEFAULT)
+
+
+def activate(profiler):
+    """Pasang profiler untuk thread ini (None = kembali ke default proses)."""
+    if profiler is None:
+        _current.__dict__.pop("profiler", None)
+    else:
+        _current.profiler = profiler
+
+
+def stage(name, rows=None):
+    """Context manager pencatat satu stage; no-op kalau tidak ada profiler aktif.
+
+    rows boleh diisi belakangan di dalam blok: `with stage("x") as s: ...; s.rows = n`.
+    """
+    profiler = current()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name, rows)
+
+
+def nbytes(obj):
+    """Perkiraan memori obyek: DataFrame / Series / Index (deep), ndarray, dan isi
+    dataclass / dict / list / tuple secara rekursif."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return sum(nbytes(getattr(obj, field.name)) for field in dataclasses.fields(obj))
+    if isinstance(obj, dict):
+        return sum(nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(value) for value in obj)
+    return sys.getsizeof(obj)
+
+
+def memory_footprint(**objects):
+    """Tabel memori (MB) per obyek bernama, plus baris Total."""
+    sizes = pd.Series({name: nbytes(obj) for name, obj in objects.items()}, dtype="int64")
+    sizes["Total"] = sizes.sum()
+    return (sizes / 2**20).round(2).rename("MB").to_frame()
+
+
+def column_footprint(df):
+    """Memori (MB) dan dtype per kolom frame transaksi, urut dari yang terbesar."""
+    usage = df.memory_usage(deep=True, index=False)
+    return (
+        pd.DataFrame({"dtype": df.dtypes.astype(str), "MB": (usage / 2**20).round(2)})
+        .sort_values("MB", ascending=False)
+    )
+
+
+def _len_or_none(value):
+    if isinstance(value, (str, bytes)) or not hasattr(value, "__len__"):
+        return None
+    return len(value)
+
+
+def timed(name=None, rows="arg"):
+    """Decorator stage(): rows diambil dari len(argumen pertama) ("arg"), len(hasil) ("result"), atau None."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = current()
+            if profiler is None:
+                return func(*args, **kwargs)
+
+            with profiler.stage(label, _len_or_none(args[0]) if rows == "arg" and args else None) as s:
+                result = func(*args, **kwargs)
+                if rows == "result":
+                    s.rows = _len_or_none(result)
+            return result
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from distinct import count_distinct
+from profiling import timed
+
+RFM_COLUMNS = ["Recency", "Frequency", "Monetary"]
+
+# Urutan segmen untuk chart / tabel
+SEGMENT_ORDER = [
+    "Champions",
+    "Loyal Customers",
+    "New Customers",
+    "Potential Loyalists",
+    "At Risk",
+    "Hibernating",
+    "Lost",
+]
+
+
+@timed("rfm_state")
+def rfm_state(df):
+    """State RFM per CustomerID yang bisa di-merge: LastPurchase, Frequency, Monetary.
+
+    LastPurchase : tanggal invoice pembelian terakhir (NaT kalau hanya ada cancel / retur)
+    Frequency    : jumlah InvoiceNo unik, tanpa invoice cancel ("C...")
+    Monetary     : total TotalAmount, sudah dikurangi retur
+    """
+    tx = df.loc[df["CustomerID"].notna(), ["CustomerID", "InvoiceNo", "InvoiceKey", "InvoiceDate", "TotalAmount"]]
+
+    cust_codes, customers = pd.factorize(tx["CustomerID"], sort=True)
+    n_customers = len(customers)
+
+    # Monetary: jumlah TotalAmount per kode customer
+    monetary = np.bincount(cust_codes, weights=tx["TotalAmount"].to_numpy("float64"), minlength=n_customers)
+
+    # Frequency & LastPurchase hanya dari pembelian: invoice cancel / retur (sama seperti basket)
+    # bukan kunjungan belanja
+    purchase = ~tx["InvoiceNo"].str.startswith("C", na=False).to_numpy(bool)
+    purchase_codes = cust_codes[purchase]
+
+    # Frequency: jumlah InvoiceKey unik per customer
+    frequency = count_distinct(purchase_codes, tx["InvoiceKey"].to_numpy()[purchase], n_customers)
+
+    # Tanggal pembelian terakhir per customer; int64 min = NaT untuk customer tanpa pembelian
+    ts = tx["InvoiceDate"].to_numpy("datetime64[ns]").view("int64")
+    latest = pd.Series(ts[purchase]).groupby(purchase_codes).max()
+    last_ts = np.full(n_customers, np.iinfo(np.int64).min)
+    last_ts[latest.index.to_numpy()] = latest.to_numpy()
+
+    return pd.DataFrame(
+        {
+            "LastPurchase": last_ts.view("datetime64[ns]"),
+            "Frequency": frequency.astype("int32"),
+            "Monetary": monetary,
+        },
+        # CustomerID categorical -> index string biasa, supaya state antar chunk bisa di-merge
+        index=pd.Index(np.asarray(customers, dtype=object), name="CustomerID"),
+    )
+
+
+def rfm_from_state(state, snapshot_date=None):
+    """Tambahkan Recency (hari sejak LastPurchase sampai snapshot_date).
+
+    Customer yang hanya punya cancel / retur (Frequency 0) tidak dinilai.
+    Default snapshot_date: tanggal pembelian terakhir + 1 hari.
+    """
+    state = state[state["Frequency"] > 0]
+    last_purchase = state["LastPurchase"].to_numpy("datetime64[ns]")
+    if snapshot_date is None:
+        snapshot_date = last_purchase.max() + np.timedelta64(1, "D")
+    snapshot_date = np.datetime64(pd.Timestamp(snapshot_date), "ns")
+    recency = (snapshot_date - last_purchase) // np.timedelta64(1, "D")
+
+    rfm = state[["Frequency", "Monetary", "LastPurchase"]].copy()
+    rfm.insert(0, "Recency", recency.astype("int32"))
+    return rfm
+
+
+def compute_rfm(df, snapshot_date=None):
+    """Recency / Frequency / Monetary per CustomerID dalam satu pass vektor."""
+    return rfm_from_state(rfm_state(df), snapshot_date)
+
+
+def quantile_score(values, q=5, higher_is_better=True):
+    """Skor kuantil 1..q berdasarkan peringkat empiris (np.sort + searchsorted).
+
+    Nilai yang sama selalu mendapat skor yang sama.
+    """
+    values = np.asarray(values)
+    cdf = np.searchsorted(np.sort(values), values, side="right") / len(values)
+    score = np.ceil(cdf * q).astype(np.int8)
+    if not higher_is_better:
+        score = (q + 1 - score).astype(np.int8)
+    return score
+
+
+def segment_labels(r_score, f_score):
+    """Nama segmen dari kombinasi skor R dan F (skala 1-5)."""
+    conditions = [
+        (r_score >= 4) & (f_score >= 4),
+        (r_score >= 3) & (f_score >= 3),
+        (r_score >= 4) & (f_score <= 2),
+        r_score >= 3,
+        (r_score <= 2) & (f_score >= 3),
+        r_score == 2,
+    ]
+    return np.select(conditions, SEGMENT_ORDER[:-1], default=SEGMENT_ORDER[-1])
+
+
+@timed("score_rfm")
+def score_rfm(rfm, q=5):
+    """Tambahkan kolom R/F/M_Score, RFM_Score, RFM_Segment dan Segment."""
+    rfm = rfm.copy()
+    rfm["R_Score"] = quantile_score(rfm["Recency"].to_numpy(), q, higher_is_better=False)
+    rfm["F_Score"] = quantile_score(rfm["Frequency"].to_numpy(), q)
+    rfm["M_Score"] = quantile_score(rfm["Monetary"].to_numpy(), q)
+
+    rfm["RFM_Score"] = (rfm["R_Score"] + rfm["F_Score"] + rfm["M_Score"]).astype("int8")
+    rfm["RFM_Segment"] = (
+        rfm["R_Score"].astype(str) + rfm["F_Score"].astype(str) + rfm["M_Score"].astype(str)
+    )
+    rfm["Segment"] = pd.Categorical(
+        segment_labels(rfm["R_Score"].to_numpy(), rfm["F_Score"].to_numpy()),
+        categories=SEGMENT_ORDER,
+    )
+    return rfm
+
+
+def segment_summary(rfm):
+    """Jumlah customer dan rata-rata R/F/M per segmen."""
+    summary = rfm.groupby("Segment", observed=True).agg(
+        Customers=("Recency", "size"),
+        AvgRecency=("Recency", "mean"),
+        AvgFrequency=("Frequency", "mean"),
+        AvgMonetary=("Monetary", "mean"),
+        TotalMonetary=("Monetary", "sum"),
+    )
+    summary["CustomerPercentage"] = (summary["Customers"] / summary["Customers"].sum() * 100).round(2)
+    return summary.reset_index()
@@ -0,0 +1,112 @@
+"""Indeks pencarian customer / produk untuk drill-down interaktif.
+
+- CustomerID -> rentang di permutasi integer yang mengurutkan tabel transaksi per customer
+  (searchsorted, O(log n) per lookup, tanpa scan tabel). Tabelnya sendiri tidak di-copy:
+  indeks menunjuk ke frame yang sama dengan store urut tanggal (filters.DateSortedStore).
+- Description -> pencarian prefix (searchsorted di kunci lowercase yang sudah urut) lalu
+  substring di daftar Description unik (ukurannya mengikuti katalog, bukan jumlah baris).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from profiling import timed
+
+HISTORY_COLUMNS = [
+    "InvoiceNo", "InvoiceDate", "StockCode", "Description", "Quantity", "UnitPrice", "TotalAmount", "Country",
+]
+
+
+@dataclass
+class SearchIndex:
+    """customers : CustomerID unik (urut)
+    order        : posisi baris di lines, urut per customer lalu InvoiceDate;
+                   baris customer ke-i = lines.iloc[order[starts[i]:starts[i + 1]]]
+    lines        : tabel transaksi bersama (bukan salinan)
+    descriptions : Description unik, urut berdasarkan description_keys (lowercase)
+    """
+
+    customers: np.ndarray
+    starts: np.ndarray
+    order: np.ndarray
+    lines: pd.DataFrame
+    descriptions: np.ndarray
+    description_keys: np.ndarray
+
+
+@timed("search_index")
+def build_search_index(df):
+    """Indeks di atas df (biasanya DateSortedStore.lines); yang disimpan hanya permutasi integer."""
+    codes, customers = pd.factorize(np.asarray(df["CustomerID"], dtype=object), sort=True)
+
+    # Baris tanpa CustomerID (kode -1) tidak masuk indeks
+    rows = np.flatnonzero(codes >= 0)
+    dates = df["InvoiceDate"].to_numpy("datetime64[ns]").view("int64")
+    order = rows[np.lexsort((dates[rows], codes[rows]))]
+    starts = np.searchsorted(codes[order], np.arange(len(customers) + 1))
+
+    # Description asli dipertahankan (termasuk spasi) supaya cocok dengan key di cube
+    descriptions = pd.Series(df["Description"].dropna().unique()).astype(str).drop_duplicates()
+    descriptions = descriptions[descriptions.str.strip() != ""]
+    keys = descriptions.str.strip().str.lower().to_numpy(dtype=object)
+    desc_order = np.argsort(keys, kind="stable")
+
+    return SearchIndex(
+        customers=np.asarray(customers, dtype=object),
+        starts=starts,
+        order=order,
+        lines=df,
+        descriptions=descriptions.to_numpy(dtype=object)[desc_order],
+        description_keys=keys[desc_order],
+    )
+
+
+def _prefix_range(sorted_values, prefix):
+    lo = np.searchsorted(sorted_values, prefix, side="left")
+    hi = np.searchsorted(sorted_values, prefix + "\uffff", side="right")
+    return lo, hi
+
+
+def customer_lines(index, customer_id):
+    """Transaksi satu customer (urut tanggal); frame kosong kalau CustomerID tidak ada."""
+    customer_id = str(customer_id).strip()
+    pos = np.searchsorted(index.customers, customer_id)
+    if pos == len(index.customers) or index.customers[pos] != customer_id:
+        return index.lines.iloc[0:0][HISTORY_COLUMNS]
+    # Hanya baris customer ini yang di-copy
+    rows = index.order[index.starts[pos]:index.starts[pos + 1]]
+    return index.lines.iloc[rows][HISTORY_COLUMNS].reset_index(drop=True)
+
+
+def match_customers(index, prefix, limit=20):
+    """CustomerID yang diawali prefix (urut)."""
+    lo, hi = _prefix_range(index.customers, str(prefix).strip())
+    return list(index.customers[lo:min(hi, lo + limit)])
+
+
+def match_descriptions(index, query, limit=20):
+    """Description yang cocok: prefix lebih dulu, lalu yang mengandung query di tengah."""
+    query = str(query).strip().lower()
+    if not query:
+        return []
+
+    lo, hi = _prefix_range(index.description_keys, query)
+    matches = list(index.descriptions[lo:min(hi, lo + limit)])
+    if len(matches) < limit:
+        contains = pd.Series(index.description_keys).str.contains(query, regex=False).to_numpy()
+        contains[lo:hi] = False
+        matches += list(index.descriptions[contains][: limit - len(matches)])
+    return matches
+
+
+def invoice_history(lines):
+    """Ringkasan per invoice dari baris transaksi customer, terbaru lebih dulu."""
+    history = lines.groupby("InvoiceNo", observed=True).agg(
+        InvoiceDate=("InvoiceDate", "first"),
+        Items=("StockCode", "size"),
+        Quantity=("Quantity", "sum"),
+        TotalAmount=("TotalAmount", "sum"),
+        Country=("Country", "first"),
+    )
+    return history.sort_values("InvoiceDate", ascending=False).reset_index()
@@ -0,0 +1,21 @@
+import streamlit as st
+
+from profiling import stage
+
+# st.fragment (Streamlit >= 1.37): widget di dalam section hanya me-rerun section itu sendiri,
+# bukan seluruh halaman. Versi lama: fallback ke experimental_fragment / fungsi biasa.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+_toggle = getattr(st, "toggle", st.checkbox)
+
+
+def lazy_section(label, key, render, expanded=False):
+    """Expander yang agregasi + figure-nya baru dihitung setelah section dibuka.
+
+    Streamlit tetap mengeksekusi isi expander walaupun tertutup, jadi render() dijaga
+    oleh toggle: selama toggle mati, section ini tidak memakan waktu rerun.
+    """
+    with st.expander(label, expanded=expanded):
+        if _toggle("Tampilkan", value=expanded, key=f"show_{key}"):
+            with stage(f"section:{key}"):
+                render()
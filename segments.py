@@ -0,0 +1,107 @@
+"""Model segmentasi tersimpan + batch scoring, tanpa perlu menjalankan dashboard.
+
+Pemakaian (mis. job malam):
+    python segments.py fit --data OnlineRetail.csv --k 4
+    python segments.py fit --data "exports/*.csv" --k 4      # direktori / glob juga bisa
+    python segments.py assign transaksi_baru.csv --output segmen.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from clustering import fit_kmeans, rfm_features
+from data_loader import CACHE_DIR, DATA_PATH, load_transactions
+from rfm import RFM_COLUMNS, compute_rfm
+
+MODEL_PATH = os.path.join(CACHE_DIR, "segment_model.npz")
+CHUNK_SIZE = 1_000_000
+
+
+def fit_segments(rfm, k=4, path=MODEL_PATH, random_state=42):
+    """Fit scaler + MiniBatchKMeans pada tabel RFM lalu simpan ke file .npz kecil.
+
+    Yang disimpan hanya mean/scale scaler dan centroid (float32), bukan objek sklearn.
+    """
+    X, scaler = rfm_features(rfm)
+    model = fit_kmeans(X, k, random_state)
+    params = {
+        "mean": scaler.mean_.astype(np.float32),
+        "scale": scaler.scale_.astype(np.float32),
+        "centroids": model.cluster_centers_.astype(np.float32),
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, **params)
+    return params
+
+
+def load_segment_model(path=MODEL_PATH):
+    with np.load(path) as data:
+        return {name: data[name] for name in ("mean", "scale", "centroids")}
+
+
+def _nearest_centroid(X, centroids):
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2; ||x||^2 sama untuk semua c jadi tidak perlu dihitung
+    distances = (centroids ** 2).sum(axis=1) - 2 * X @ centroids.T
+    return distances.argmin(axis=1).astype(np.int16)
+
+
+def assign_segments(df, model=None, path=MODEL_PATH, chunk_size=CHUNK_SIZE, snapshot_date=None):
+    """Segment per customer untuk tabel RFM (atau tabel transaksi, RFM dihitung dulu).
+
+    Diproses per chunk supaya memori tetap kecil walaupun customer-nya jutaan.
+    """
+    if model is None:
+        model = load_segment_model(path)
+    rfm = df if set(RFM_COLUMNS).issubset(df.columns) else compute_rfm(df, snapshot_date)
+
+    values = rfm[RFM_COLUMNS].to_numpy(np.float32)
+    segments = np.empty(len(values), dtype=np.int16)
+    for start in range(0, len(values), chunk_size):
+        chunk = np.log1p(np.clip(values[start:start + chunk_size], 0, None))
+        X = (chunk - model["mean"]) / model["scale"]
+        segments[start:start + chunk_size] = _nearest_centroid(X, model["centroids"])
+
+    return pd.Series(segments, index=rfm.index, name="Segment")
+
+
+def _read_input(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return load_transactions(path, use_sidecar=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit / scoring model segmentasi pelanggan RFM.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fit = sub.add_parser("fit", help="fit model dari file transaksi")
+    fit.add_argument("--data", default=DATA_PATH)
+    fit.add_argument("--k", type=int, default=4)
+    fit.add_argument("--model", default=MODEL_PATH)
+
+    assign = sub.add_parser("assign", help="assign segmen untuk file transaksi / RFM")
+    assign.add_argument("input")
+    assign.add_argument("--output", required=True)
+    assign.add_argument("--model", default=MODEL_PATH)
+    assign.add_argument("--snapshot-date", default=None)
+    assign.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        rfm = compute_rfm(load_transactions(args.data))
+        params = fit_segments(rfm, k=args.k, path=args.model)
+        print(f"Model {len(params['centroids'])} segmen dari {len(rfm):,} pelanggan disimpan ke {args.model}")
+    else:
+        df = _read_input(args.input)
+        rfm = df if set(RFM_COLUMNS).issubset(df.columns) else compute_rfm(df, args.snapshot_date)
+        rfm = rfm.assign(Segment=assign_segments(rfm, path=args.model, chunk_size=args.chunk_size))
+        rfm[RFM_COLUMNS + ["Segment"]].to_csv(args.output)
+        print(f"{len(rfm):,} pelanggan di-scoring -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
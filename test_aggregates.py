@@ -0,0 +1,34 @@
+"""Regresi build_cube untuk nilai kosong yang ada di OnlineRetail.csv asli.
+
+Pemakaian:
+    python -m pytest -q test_aggregates.py
+"""
+import io
+
+from aggregates import build_cube, product_summary
+from data_loader import add_calendar_columns, clean_transactions, read_raw
+
+# Baris 536366: Description (dan CustomerID) kosong, seperti ~1.4 ribu baris di data asli
+CSV = """InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country
+536365,85123A,WHITE HANGING HEART T-LIGHT HOLDER,6,12/1/2010 8:26,2.55,17850,United Kingdom
+536365,71053,WHITE METAL LANTERN,6,12/1/2010 8:26,3.39,17850,United Kingdom
+536366,22633,,2,12/1/2010 8:28,1.85,,United Kingdom
+536367,71053,WHITE METAL LANTERN,4,12/1/2010 8:34,3.39,13047,France
+"""
+
+
+def load(text):
+    return add_calendar_columns(clean_transactions(read_raw(io.StringIO(text))))
+
+
+def test_missing_description_is_left_out_of_products():
+    cube = build_cube(load(CSV))
+
+    products = product_summary(cube).astype({"Description": str}).set_index("Description")
+    assert set(products.index) == {"WHITE HANGING HEART T-LIGHT HOLDER", "WHITE METAL LANTERN"}
+    assert products.loc["WHITE METAL LANTERN", "UniqueInvoices"] == 2
+    assert products.loc["WHITE HANGING HEART T-LIGHT HOLDER", "UniqueInvoices"] == 1
+
+    # Baris tanpa Description tetap masuk agregat negara / bulan
+    assert cube.activity["Lines"].sum() == 4
+    assert cube.activity["Invoices"].sum() == 3
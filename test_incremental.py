@@ -0,0 +1,128 @@
+"""Regresi: state yang dibangun bertahap (per chunk, multi-file, base + delta) harus sama
+dengan state dari satu kali build atas seluruh transaksi.
+
+Pemakaian:
+    python -m pytest -q test_incremental.py
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import generate_csv
+from data_loader import add_calendar_columns, clean_transactions, read_raw
+from incremental import append_delta, build_state, ingest_state, load_or_build_state, stream_state
+
+ROWS = 20_000
+# Chunk kecil dan ganjil supaya batas chunk sering jatuh di tengah invoice
+CHUNK_SIZE = 997
+
+
+def split_by_invoice(path, parts, out_dir):
+    """Pecah CSV jadi `parts` file, tiap potongan berhenti di batas invoice; return path-nya."""
+    raw = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="latin1")
+    invoices = raw["InvoiceNo"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, invoices[1:] != invoices[:-1]])
+    cuts = [
+        int(starts[min(np.searchsorted(starts, len(raw) * i // parts), len(starts) - 1)])
+        for i in range(1, parts)
+    ]
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, (lo, hi) in enumerate(zip([0] + cuts, cuts + [len(raw)])):
+        part = os.path.join(out_dir, f"part-{i}.csv")
+        raw.iloc[lo:hi].to_csv(part, index=False, encoding="latin1")
+        paths.append(part)
+    return paths
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("data") / "OnlineRetail.csv")
+    generate_csv(path, ROWS, lines_per_invoice=20, n_products=300)
+    return path
+
+
+@pytest.fixture(scope="module")
+def parts(dataset):
+    return split_by_invoice(dataset, 3, os.path.join(os.path.dirname(dataset), "parts"))
+
+
+@pytest.fixture(scope="module")
+def reference(dataset):
+    return build_state(add_calendar_columns(clean_transactions(read_raw(dataset))), "reference")
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    # CACHE_DIR relatif terhadap cwd: jangan sentuh .cache milik dashboard
+    monkeypatch.chdir(tmp_path)
+
+
+def _comparable(obj):
+    """Frame urut dengan index jadi kolom dan categorical / object jadi string."""
+    if isinstance(obj, pd.Series):
+        obj = obj.reset_index()
+        obj.columns = range(obj.shape[1])
+    elif not isinstance(obj.index, pd.RangeIndex):
+        obj = obj.reset_index()
+    text = [col for col in obj.columns if isinstance(obj[col].dtype, pd.CategoricalDtype) or obj[col].dtype == object]
+    obj = obj.astype({col: str for col in text})
+    return obj.sort_values(list(obj.columns)).reset_index(drop=True)
+
+
+def assert_states_equal(actual, expected):
+    for name in ("activity", "products", "customers", "monthly_customers"):
+        pd.testing.assert_frame_equal(
+            _comparable(getattr(actual["cube"], name)),
+            _comparable(getattr(expected["cube"], name)),
+            check_dtype=False,
+            obj=f"cube.{name}",
+        )
+    np.testing.assert_array_equal(actual["cube"].activity_matrix, expected["cube"].activity_matrix)
+
+    for name in ("rfm_state", "month_customers", "customer_activity"):
+        pd.testing.assert_frame_equal(
+            _comparable(actual[name]), _comparable(expected[name]), check_dtype=False, obj=name
+        )
+
+
+def test_chunked_state_matches_single_pass(dataset, reference):
+    assert_states_equal(stream_state(dataset, "chunked", chunksize=CHUNK_SIZE), reference)
+
+
+def test_multi_file_state_matches_single_pass(parts, reference):
+    pattern = os.path.join(os.path.dirname(parts[0]), "part-*.csv")
+    assert_states_equal(ingest_state(pattern, "multi-file", n_jobs=1, chunksize=CHUNK_SIZE), reference)
+
+
+def test_base_plus_deltas_matches_single_pass(parts, reference, tmp_path):
+    base, *deltas = parts
+    store_dir = str(tmp_path / "store")
+
+    load_or_build_state(base, store_dir)
+    for delta in deltas:
+        append_delta(delta, base, store_dir)
+
+    # State dibaca ulang dari disk, seperti yang dilakukan dashboard
+    assert_states_equal(load_or_build_state(base, store_dir), reference)
+
+
+def test_append_rejects_same_delta_content(parts, tmp_path):
+    base, delta = parts[:2]
+    store_dir = str(tmp_path / "store")
+    append_delta(delta, base, store_dir)
+
+    # Isi sama dengan nama / mtime lain tetap delta yang sama: Frequency & Monetary tidak boleh dobel
+    copy = str(tmp_path / "delta-copy.csv")
+    shutil.copyfile(delta, copy)
+    with pytest.raises(ValueError):
+        append_delta(copy, base, store_dir)
+
+    stat = os.stat(copy)
+    os.utime(copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with pytest.raises(ValueError):
+        append_delta(copy, base, store_dir)
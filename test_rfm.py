@@ -0,0 +1,51 @@
+"""Regresi rfm_state: invoice cancel / retur ("C...") bukan pembelian.
+
+Pemakaian:
+    python -m pytest -q test_rfm.py
+"""
+import io
+
+import pandas as pd
+import pytest
+
+from data_loader import add_calendar_columns, clean_transactions, read_raw
+from incremental import merge_rfm_state
+from rfm import rfm_from_state, rfm_state
+
+# 17850 membeli 2x lalu retur belakangan; 13047 hanya punya retur
+CSV = """InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country
+536365,71053,WHITE METAL LANTERN,6,12/1/2010 8:26,3.39,17850,United Kingdom
+536370,71053,WHITE METAL LANTERN,4,12/3/2010 9:00,3.39,17850,United Kingdom
+C536379,71053,WHITE METAL LANTERN,-2,12/9/2010 10:00,3.39,17850,United Kingdom
+C536383,22633,HAND WARMER UNION JACK,-1,12/9/2010 11:00,1.85,13047,United Kingdom
+"""
+
+
+def load(text):
+    return add_calendar_columns(clean_transactions(read_raw(io.StringIO(text))))
+
+
+def test_cancellations_do_not_count_as_purchases():
+    state = rfm_state(load(CSV))
+
+    customer = state.loc["17850"]
+    assert customer["Frequency"] == 2
+    assert customer["LastPurchase"] == pd.Timestamp("2010-12-03 09:00")
+    # Monetary tetap bersih setelah retur
+    assert customer["Monetary"] == pytest.approx((6 + 4 - 2) * 3.39)
+
+    assert state.loc["13047", "Frequency"] == 0
+    assert pd.isna(state.loc["13047", "LastPurchase"])
+
+    rfm = rfm_from_state(state)
+    assert list(rfm.index) == ["17850"]
+    assert rfm.loc["17850", "Recency"] == 1
+
+
+def test_merge_keeps_purchase_date_over_later_return():
+    lines = CSV.splitlines(keepends=True)
+    base, delta = load("".join(lines[:3])), load(lines[0] + lines[3])
+
+    merged = merge_rfm_state(rfm_state(base), rfm_state(delta))
+    assert merged.loc["17850", "Frequency"] == 2
+    assert merged.loc["17850", "LastPurchase"] == pd.Timestamp("2010-12-03 09:00")
@@ -0,0 +1,206 @@
+"""Aktivitas customer x bulan (matriks sparse) untuk RFM rolling window dan migrasi segmen.
+
+Dibangun sekali dari transaksi (bagian dari state, ikut di-merge per chunk / delta);
+RFM untuk window bulan mana pun cukup menjumlahkan kolom matriks, tanpa scan transaksi.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from aggregates import year_month_labels
+from distinct import count_distinct
+from profiling import timed
+from rfm import SEGMENT_ORDER, score_rfm
+
+CUSTOMER_MONTH_KEYS = ["CustomerID", "InvoiceYearMonth"]
+INACTIVE = "Tidak Aktif"
+_EPOCH_ORDINAL = 1970 * 12
+
+
+def month_ordinal(codes):
+    """yyyymm -> nomor bulan berurutan (tahun * 12 + bulan - 1): selisih bulan = pengurangan biasa."""
+    codes = np.asarray(codes, dtype=np.int64)
+    return codes // 100 * 12 + codes % 100 - 1
+
+
+def ordinal_to_code(ordinals):
+    """Kebalikan month_ordinal: nomor bulan -> yyyymm."""
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    return ordinals // 12 * 100 + ordinals % 12 + 1
+
+
+def _month_start_day(ordinal):
+    # Hari (sejak 1970-01-01) tanggal 1 bulan ordinal
+    return int(np.datetime64(int(ordinal) - _EPOCH_ORDINAL, "M").astype("datetime64[D]").astype(np.int64))
+
+
+@timed("customer_activity")
+def customer_activity(df):
+    """Ringkasan per (CustomerID, bulan): Revenue, Invoices, LastPurchase. Bisa di-merge antar chunk."""
+    tx = df.loc[
+        df["CustomerID"].notna(),
+        ["CustomerID", "InvoiceYearMonth", "InvoiceKey", "InvoiceDate", "TotalAmount"],
+    ]
+    if tx.empty:
+        return pd.DataFrame({
+            "CustomerID": pd.Series(dtype=object),
+            "InvoiceYearMonth": pd.Series(dtype="int32"),
+            "Revenue": pd.Series(dtype="float64"),
+            "Invoices": pd.Series(dtype="int32"),
+            "LastPurchase": pd.Series(dtype="datetime64[ns]"),
+        })
+
+    cust_codes, customers = pd.factorize(tx["CustomerID"])
+    month_codes, months = pd.factorize(tx["InvoiceYearMonth"])
+    n_months = len(months)
+
+    # Kode sel (customer, bulan) hanya untuk sel yang benar-benar ada
+    cell_codes, cells = pd.factorize(cust_codes.astype(np.int64) * n_months + month_codes)
+    n_cells = len(cells)
+
+    revenue = np.bincount(cell_codes, weights=tx["TotalAmount"].to_numpy("float64"), minlength=n_cells)
+    invoices = count_distinct(cell_codes, tx["InvoiceKey"].to_numpy(), n_cells)
+    ts = tx["InvoiceDate"].to_numpy("datetime64[ns]").view("int64")
+    last_ts = pd.Series(ts).groupby(cell_codes).max().to_numpy()
+
+    return pd.DataFrame({
+        "CustomerID": np.asarray(customers, dtype=object)[cells // n_months],
+        "InvoiceYearMonth": np.asarray(months)[cells % n_months].astype("int32"),
+        "Revenue": revenue,
+        "Invoices": invoices.astype("int32"),
+        "LastPurchase": last_ts.view("datetime64[ns]"),
+    })
+
+
+def merge_customer_activity(activity, delta_activity):
+    """Gabungkan dua ringkasan customer x bulan (sel yang sama: jumlah / max)."""
+    merged = pd.concat([activity, delta_activity], ignore_index=True)
+    return (
+        merged.groupby(CUSTOMER_MONTH_KEYS, sort=False)
+        .agg(
+            Revenue=("Revenue", "sum"),
+            Invoices=("Invoices", "sum"),
+            LastPurchase=("LastPurchase", "max"),
+        )
+        .astype({"Invoices": "int32"})
+        .reset_index()
+    )
+
+
+@dataclass
+class CustomerTimeline:
+    """Matriks sparse customer x bulan (kolom = bulan berurutan tanpa lubang).
+
+    customers : Index CustomerID per baris
+    months    : array yyyymm per kolom
+    revenue   : csr float64, Revenue per sel
+    invoices  : csr int32, jumlah invoice per sel
+    last_day  : csr int32, hari pembelian terakhir di sel (hari sejak 1970-01-01, +1 supaya 0 = kosong)
+    """
+
+    customers: pd.Index
+    months: np.ndarray
+    revenue: sparse.csr_matrix
+    invoices: sparse.csr_matrix
+    last_day: sparse.csr_matrix
+
+    @property
+    def first_ordinal(self):
+        return int(month_ordinal(self.months[0]))
+
+
+@timed("build_timeline", rows=None)
+def build_timeline(activity):
+    """CustomerTimeline dari ringkasan customer_activity (semua bulan, kode integer)."""
+    cust_codes, customers = pd.factorize(activity["CustomerID"], sort=True)
+    ordinals = month_ordinal(activity["InvoiceYearMonth"].to_numpy())
+    first = ordinals.min()
+    cols = ordinals - first
+    shape = (len(customers), int(ordinals.max() - first + 1))
+
+    def matrix(values, dtype):
+        return sparse.csr_matrix((np.asarray(values, dtype=dtype), (cust_codes, cols)), shape=shape)
+
+    days = activity["LastPurchase"].to_numpy("datetime64[D]").astype(np.int64) + 1
+    return CustomerTimeline(
+        customers=pd.Index(customers, name="CustomerID"),
+        months=ordinal_to_code(np.arange(first, first + shape[1])),
+        revenue=matrix(activity["Revenue"], np.float64),
+        invoices=matrix(activity["Invoices"], np.int32),
+        last_day=matrix(days, np.int32),
+    )
+
+
+def _rolling_rfm(timeline, t, window):
+    # RFM customer yang aktif di kolom (t - window, t]; return (posisi baris, tabel RFM ter-score)
+    cols = slice(max(t - window + 1, 0), t + 1)
+    frequency = np.asarray(timeline.invoices[:, cols].sum(axis=1)).ravel()
+    rows = np.flatnonzero(frequency > 0)
+
+    monetary = np.asarray(timeline.revenue[:, cols].sum(axis=1)).ravel()
+    last_day = timeline.last_day[:, cols].max(axis=1).toarray().ravel() - 1
+
+    # Snapshot = tanggal 1 bulan berikutnya (akhir bulan t)
+    snapshot = _month_start_day(timeline.first_ordinal + t + 1)
+    rfm = pd.DataFrame(
+        {
+            "Recency": (snapshot - last_day[rows]).astype("int32"),
+            "Frequency": frequency[rows].astype("int32"),
+            "Monetary": monetary[rows],
+        },
+        index=timeline.customers[rows],
+    )
+    return rows, score_rfm(rfm)
+
+
+def rolling_rfm(timeline, month, window=12):
+    """RFM (sudah di-score + Segment) customer yang aktif dalam `window` bulan s.d. bulan yyyymm `month`."""
+    t = int(month_ordinal(month)) - timeline.first_ordinal
+    return _rolling_rfm(timeline, t, window)[1]
+
+
+@timed("segment_drift", rows=None)
+def segment_drift(timeline, window=12):
+    """Ukuran segmen per bulan dan migrasi segmen bulan-ke-bulan dari RFM rolling window.
+
+    Return (sizes, migration):
+      sizes     : index Month (label "2011-01"), kolom SEGMENT_ORDER + INACTIVE -> jumlah customer
+      migration : Month, From, To, Customers untuk perpindahan bulan sebelumnya -> Month
+                  (pasangan INACTIVE -> INACTIVE tidak disertakan)
+    Hanya vektor segmen bulan sebelumnya yang disimpan, jadi memori O(jumlah customer).
+    """
+    labels = SEGMENT_ORDER + [INACTIVE]
+    n_labels = len(labels)
+    inactive = n_labels - 1
+    month_labels = list(year_month_labels(timeline.months))
+
+    sizes = np.zeros((len(timeline.months), n_labels), dtype=np.int64)
+    moves = []
+    previous = None
+    for t in range(len(timeline.months)):
+        current = np.full(len(timeline.customers), inactive, dtype=np.int64)
+        rows, rfm = _rolling_rfm(timeline, t, window)
+        current[rows] = rfm["Segment"].cat.codes.to_numpy()
+        sizes[t] = np.bincount(current, minlength=n_labels)
+
+        if previous is not None:
+            counts = np.bincount(previous * n_labels + current, minlength=n_labels * n_labels)
+            src, dst = np.divmod(np.flatnonzero(counts), n_labels)
+            keep = ~((src == inactive) & (dst == inactive))
+            moves.append(pd.DataFrame({
+                "Month": month_labels[t],
+                "From": np.asarray(labels, dtype=object)[src[keep]],
+                "To": np.asarray(labels, dtype=object)[dst[keep]],
+                "Customers": counts[np.flatnonzero(counts)][keep],
+            }))
+        previous = current
+
+    sizes = pd.DataFrame(sizes, index=pd.Index(month_labels, name="Month"), columns=labels)
+    migration = (
+        pd.concat(moves, ignore_index=True)
+        if moves
+        else pd.DataFrame(columns=["Month", "From", "To", "Customers"])
+    )
+    return sizes, migration